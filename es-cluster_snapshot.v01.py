@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import urllib3
+import warnings
+from es_ilm_collect import (SNAPSHOT_CAT_COLUMNS, connect, get_auth_header, collect_cluster, collect_cluster_async,
+                            ASYNC_ENGINE_AVAILABLE, ASYNC_ENGINE_MISSING, save_snapshot)
+from datetime import datetime, timezone
+
+# Suppress all urllib3 warnings (including TLS-related)
+urllib3.disable_warnings()
+# Suppress warnings from Elasticsearch client
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Elasticsearch Cluster Snapshot (collect once, report offline with --snapshot)")
+parser.add_argument("--host", required=True, help="Elasticsearch host (e.g., https://localhost:9200)")
+parser.add_argument("--username", required=True, help="Elasticsearch username")
+parser.add_argument("--password", required=True, help="Elasticsearch password")
+parser.add_argument("--explain-mode", choices=["batch", "per-index"], default="batch",
+                    help="Fetch ILM explain data in batched requests, or one request per index (for per-index privileges)")
+parser.add_argument("--engine", choices=["sync", "async"], default="sync",
+                    help="Collect with the synchronous client, or with AsyncElasticsearch and concurrent requests")
+parser.add_argument("--concurrency", type=int, default=8,
+                    help="Maximum number of concurrent requests for per-index mode and the async engine (default: 8)")
+parser.add_argument("--output", help="Snapshot file to write (default: es-cluster_snapshot_<date>.json, .gz to compress)")
+args = parser.parse_args()
+if args.concurrency < 1:
+    parser.error("--concurrency must be at least 1")
+if args.engine == "async" and not ASYNC_ENGINE_AVAILABLE:
+    parser.error(f"--engine async: {ASYNC_ENGINE_MISSING}")
+
+# Set output file name based on script name and current date
+current_date = datetime.now().strftime("%Y-%m-%d")
+script_name = "es-cluster_snapshot"
+snapshot_output_file = args.output or f"{script_name}_{current_date}.json"
+
+# Collect cluster info, indices, ILM explain data and policies once for all reports
+if args.engine == "async":
+    cluster = asyncio.run(collect_cluster_async(args.host, args.username, args.password, SNAPSHOT_CAT_COLUMNS,
+                                                args.explain_mode, args.concurrency, cat_bytes="b"))
+else:
+    # Connect to Elasticsearch, ignoring certificate verification
+    es = connect(args.host, args.username, args.password, args.concurrency)
+    cluster = collect_cluster(es, SNAPSHOT_CAT_COLUMNS, get_auth_header(args.username, args.password),
+                              args.explain_mode, args.concurrency, cat_bytes="b")
+
+if not cluster["info"]:
+    print("Error: No data collected, snapshot not written")
+    raise SystemExit(1)
+
+print(f"Collected {len(cluster['indices'])} indices, {len(cluster['explain'])} ILM explain entries, "
+      f"{len(cluster['policies'])} ILM policies")
+
+# Output snapshot to file
+try:
+    save_snapshot(cluster, snapshot_output_file, SNAPSHOT_CAT_COLUMNS, cat_bytes="b",
+                  collected_at=datetime.now(timezone.utc).isoformat())
+    print(f"Snapshot written to {snapshot_output_file}")
+except Exception as e:
+    print(f"Error writing to snapshot file '{snapshot_output_file}': {str(e)}")
+    raise SystemExit(1)
@@ -0,0 +1,45 @@
+import argparse
+import signal
+import time
+from es_ilm_fake import FakeCluster, start_fake_server
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Fake Elasticsearch cluster for running and benchmarking the es-ilm scripts offline")
+parser.add_argument("--indices", type=int, default=1000, help="Number of synthetic indices (default: 1000)")
+parser.add_argument("--policies", type=int, default=10, help="Number of synthetic ILM policies (default: 10)")
+parser.add_argument("--seed", type=int, default=1, help="Random seed of the synthetic cluster (default: 1)")
+parser.add_argument("--snapshot", help="Replay this es-cluster_snapshot file (collected with bytes=b) instead of synthetic data")
+parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency per request in milliseconds (default: 0)")
+parser.add_argument("--bind", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+parser.add_argument("--port", type=int, default=9200, help="Port to listen on (default: 9200)")
+args = parser.parse_args()
+if args.indices < 0 or args.policies < 0 or args.latency_ms < 0:
+    parser.error("--indices, --policies and --latency-ms must not be negative")
+
+# Build the cluster data, then serve it until interrupted
+if args.snapshot:
+    try:
+        cluster = FakeCluster.from_snapshot(args.snapshot, args.latency_ms / 1000)
+    except Exception as e:
+        print(f"Error reading snapshot '{args.snapshot}': {str(e)}")
+        raise SystemExit(1)
+    print(f"Replaying {args.snapshot}: {len(cluster.indices)} indices, {len(cluster.policies)} ILM policies")
+else:
+    cluster = FakeCluster.synthetic(args.indices, args.policies, args.latency_ms / 1000, args.seed)
+    print(f"Synthetic cluster: {len(cluster.indices)} indices, {len(cluster.policies)} ILM policies")
+
+# Function to stop serving on SIGTERM the same way as on Ctrl+C
+def stop(signum, frame):
+    raise KeyboardInterrupt
+
+signal.signal(signal.SIGTERM, stop)
+server = start_fake_server(cluster, args.bind, args.port)
+print(f"Serving on {server.url} with {args.latency_ms:g} ms latency per request (any username/password works)")
+try:
+    while True:
+        time.sleep(3600)
+except KeyboardInterrupt:
+    pass
+finally:
+    server.shutdown()
+    print(f"Served {cluster.requests} requests, {cluster.bytes_sent} bytes")
@@ -0,0 +1,142 @@
+import json
+from elasticsearch import Elasticsearch
+import getpass
+from collections import defaultdict
+import urllib3
+import warnings
+from es_ilm_collect import get_auth_header, explain_indices
+
+# Suppress all urllib3 warnings (including TLS-related)
+urllib3.disable_warnings()
+
+# Suppress warnings from Elasticsearch client
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Prompt for Elasticsearch connection details
+host = input("Enter Elasticsearch host (e.g., https://localhost:9200): ")
+username = input("Enter username: ")
+password = getpass.getpass("Enter password: ")
+
+# Prompt for size threshold
+size_threshold_str = input("Enter size threshold (e.g., 1gb, 500mb): ")
+
+# Prompt for output file
+output_file = input("Enter output file path (e.g., output.json): ")
+
+# Function to parse size string to bytes
+def parse_size(size_str):
+    size_str = size_str.lower().strip()
+    if size_str.endswith('gb'):
+        return float(size_str[:-2]) * 1024**3
+    elif size_str.endswith('mb'):
+        return float(size_str[:-2]) * 1024**2
+    elif size_str.endswith('kb'):
+        return float(size_str[:-2]) * 1024
+    elif size_str.endswith('b'):
+        return float(size_str[:-1])
+    else:
+        try:
+            return float(size_str)  # assume bytes if no unit
+        except ValueError:
+            print(f"Warning: Invalid size threshold '{size_str}', assuming 0 bytes")
+            return 0.0
+
+# Function to format bytes to human-readable string
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if bytes >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+size_threshold = parse_size(size_threshold_str)
+
+# Encode credentials for Basic Auth header
+auth_header = get_auth_header(username, password)
+
+# Connect to Elasticsearch, ignoring certificate verification
+es = Elasticsearch(
+    [host],
+    basic_auth=(username, password),
+    verify_certs=False,
+    ssl_show_warn=False
+)
+
+# Test authentication with a simple request
+try:
+    es_info = es.info()
+    print("Successfully connected to Elasticsearch cluster")
+except Exception as e:
+    print(f"Error connecting to Elasticsearch: {str(e)}")
+    indices = []
+else:
+    # Get all indices with relevant stats (using pri.store.size for primary size check)
+    try:
+        indices = es.cat.indices(format="json", h="index,pri.store.size,pri,rep", bytes="b")
+    except Exception as e:
+        print(f"Error fetching indices: {str(e)}")
+        indices = []
+
+# Parse sizes and keep only indices below the threshold
+candidates = []
+
+for idx in indices:
+    # pri.store.size is requested in bytes (empty for closed indices)
+    size_bytes = int(idx.get("pri.store.size") or 0)
+    
+    if size_bytes < size_threshold:
+        candidates.append((idx, size_bytes))
+
+# Fetch ILM explain data for the candidate indices in a few batched requests
+ilm_explain = explain_indices(es, [idx["index"] for idx, _ in candidates], auth_header)
+
+# Group indices by ILM policy
+groups = defaultdict(list)
+for idx, size_bytes in candidates:
+    index_name = idx["index"]
+    
+    # Look up ILM info from the batched explain results
+    index_ilm = ilm_explain.get(index_name, {})
+    
+    if index_ilm.get("managed", False):
+        policy = index_ilm["policy"]
+        
+        # Get shard counts
+        pri_shards = int(idx.get("pri") or 0)
+        rep_shards = int(idx.get("rep") or 0)
+        total_shards = pri_shards * (1 + rep_shards)
+        
+        groups[policy].append({
+            "index": index_name,
+            "size_bytes": size_bytes,
+            "size_readable": format_size(size_bytes),
+            "total_shards": total_shards
+        })
+
+# Calculate stats per group
+results = {}
+for policy, idx_list in groups.items():
+    num_indices = len(idx_list)
+    total_shards = sum(i["total_shards"] for i in idx_list)
+    total_size_bytes = sum(i["size_bytes"] for i in idx_list)
+    results[policy] = {
+        "num_indices": num_indices,
+        "total_shards": total_shards,
+        "total_size": format_size(total_size_bytes),
+        "total_size_bytes": total_size_bytes,
+        "indices": [
+            {"name": i["index"], "size": i["size_readable"], "shards": i["total_shards"]}
+            for i in idx_list
+        ]
+    }
+
+# Output results to console
+print(json.dumps(results, indent=2))
+
+# Output results to file
+try:
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output_file}")
+except Exception as e:
+    print(f"Error writing to file '{output_file}': {str(e)}")
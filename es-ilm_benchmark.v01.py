@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from es_ilm_bench import STAGES
+from es_ilm_fake import FakeCluster, start_fake_server
+from es_ilm_output import CsvRowWriter, NdjsonWriter
+
+# Benchmark the ILM scripts against the fake cluster at different sizes and
+# latencies. Each script runs in its own process and temp directory under
+# es_ilm_bench, which times the stages; the fake cluster counts requests and
+# bytes. One row per (script, indices, latency) goes to the results table.
+
+DEFAULT_SCRIPTS = ["es-ilm_policy_analyzer.v09.py", "es-index_info_collector.v03.py"]
+RESULT_COLUMNS = (["run_at", "script", "indices", "latency_ms", "status", "total_s"] + [f"{stage}_s" for stage in STAGES]
+                  + ["requests", "bytes_received"])
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Benchmark the ILM scripts stage by stage against a fake cluster")
+parser.add_argument("--script", action="append", dest="scripts",
+                    help=f"Script to benchmark, repeat for several (default: {' and '.join(DEFAULT_SCRIPTS)})")
+parser.add_argument("--indices", type=int, nargs="+", default=[1000, 10000, 100000],
+                    help="Cluster sizes in indices (default: 1000 10000 100000)")
+parser.add_argument("--latency-ms", type=float, nargs="+", default=[1, 20, 100],
+                    help="Simulated latencies per request in milliseconds (default: 1 20 100)")
+parser.add_argument("--policies", type=int, default=10, help="Number of synthetic ILM policies (default: 10)")
+parser.add_argument("--timeout", type=float, default=1800,
+                    help="Seconds before a run is stopped and reported as timeout (default: 1800)")
+parser.add_argument("--output", default="es-ilm_benchmark.csv",
+                    help="Results table, CSV or .ndjson; rows are appended to an existing file (default: es-ilm_benchmark.csv)")
+args = parser.parse_args()
+scripts = args.scripts or DEFAULT_SCRIPTS
+if min(args.indices) < 1 or args.policies < 1 or min(args.latency_ms) < 0 or args.timeout <= 0:
+    parser.error("--indices and --policies must be at least 1, --latency-ms not negative and --timeout positive")
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+for script in scripts:
+    if not os.path.exists(os.path.join(repo_dir, script)):
+        parser.error(f"script '{script}' not found in {repo_dir}")
+
+# Function to run one script under es_ilm_bench; returns (status, timings)
+def run_script(script, url, work_dir):
+    timings_file = os.path.join(work_dir, "timings.json")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [repo_dir, os.environ.get("PYTHONPATH")])))
+    command = [sys.executable, "-m", "es_ilm_bench", timings_file, os.path.join(repo_dir, script),
+               "--host", url, "--username", "bench", "--password", "bench"]
+    try:
+        completed = subprocess.run(command, cwd=work_dir, env=env, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return "timeout", None
+    if not os.path.exists(timings_file):
+        print(f"  {script} failed: {completed.stderr.strip().splitlines()[-1:] or 'no output'}")
+        return "error", None
+    with open(timings_file) as f:
+        timings = json.load(f)
+    return ("ok" if timings["exit_code"] == 0 else "error"), timings
+
+# Open the results table
+writer = (NdjsonWriter(args.output, append=True) if args.output.endswith(".ndjson")
+          else CsvRowWriter(args.output, RESULT_COLUMNS, append=True))
+if writer.error:
+    print(f"Error opening results file '{args.output}': {writer.error}")
+    raise SystemExit(1)
+
+# Run every script at every size and latency, smallest clusters first
+run_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+header = f"{'Script':<34} {'Indices':>8} {'Latency':>8} {'Status':>8} {'Total':>9} " + " ".join(f"{stage:>11}" for stage in STAGES)
+print(header)
+for num_indices in sorted(args.indices):
+    cluster = FakeCluster.synthetic(num_indices, args.policies)
+    server = start_fake_server(cluster)
+    try:
+        for latency_ms in sorted(args.latency_ms):
+            cluster.latency = latency_ms / 1000
+            for script in scripts:
+                requests, bytes_sent = cluster.requests, cluster.bytes_sent
+                with tempfile.TemporaryDirectory(prefix="es-ilm_benchmark-") as work_dir:
+                    started = time.perf_counter()
+                    status, timings = run_script(script, server.url, work_dir)
+                    total = timings["total"] if timings else time.perf_counter() - started
+                stages = timings["stages"] if timings else {}
+                row = {
+                    "run_at": run_at,
+                    "script": script,
+                    "indices": num_indices,
+                    "latency_ms": latency_ms,
+                    "status": status,
+                    "total_s": round(total, 3),
+                    "requests": cluster.requests - requests,
+                    "bytes_received": cluster.bytes_sent - bytes_sent,
+                }
+                for stage in STAGES:
+                    row[f"{stage}_s"] = round(stages[stage], 3) if stage in stages else None
+                writer.write(row)
+                print(f"{script:<34} {num_indices:>8} {latency_ms:>6g}ms {status:>8} {total:>8.2f}s "
+                      + " ".join(f"{stages[stage]:>10.2f}s" if stage in stages else f"{'-':>11}" for stage in STAGES))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+writer.close()
+if writer.error:
+    print(f"Error writing results file '{args.output}': {writer.error}")
+    raise SystemExit(1)
+print(f"Results appended to {args.output}")
@@ -0,0 +1,100 @@
+import argparse
+import sqlite3
+import time
+from es_ilm_history import (DEFAULT_HISTORY_DB, open_history, snapshot_date_from_path, import_report, policy_growth,
+                            index_growth, snapshot_range, top_growing_policies)
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="ILM report history: import past runs into SQLite and query growth over time")
+parser.add_argument("--db", default=DEFAULT_HISTORY_DB, help=f"History database file (default: {DEFAULT_HISTORY_DB})")
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+import_parser = subparsers.add_parser("import", help="Import analyzer and collector report files (JSON, NDJSON, .gz, .zst)")
+import_parser.add_argument("files", nargs="+", help="Report files, e.g. es-ilm_policy_analyzer_2025-03-01.json")
+import_parser.add_argument("--date", help="Snapshot date (YYYY-MM-DD) for all files (default: the date in each file name)")
+
+growth_parser = subparsers.add_parser("growth", help="Size of one policy (or one index) per snapshot date")
+growth_target = growth_parser.add_mutually_exclusive_group(required=True)
+growth_target.add_argument("--policy", help="ILM policy name")
+growth_target.add_argument("--index", help="Index name (needs imported collector reports)")
+growth_parser.add_argument("--phase", help="Only count this ILM phase of the policy")
+growth_parser.add_argument("--since", help="First snapshot date (YYYY-MM-DD)")
+growth_parser.add_argument("--until", help="Last snapshot date (YYYY-MM-DD)")
+
+top_parser = subparsers.add_parser("top", help="Policies with the largest size growth between two snapshot dates")
+top_parser.add_argument("--since", help="Compare from the first snapshot on or after this date (default: the oldest)")
+top_parser.add_argument("--until", help="Compare to the last snapshot on or before this date (default: the newest)")
+top_parser.add_argument("--limit", type=int, default=10, help="Number of policies to show (default: 10)")
+args = parser.parse_args()
+
+# Function to format bytes to human-readable string
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if abs(bytes) >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+# Function to format a signed size change
+def format_change(bytes):
+    return ("+" if bytes >= 0 else "-") + format_size(abs(bytes))
+
+try:
+    db = open_history(args.db)
+except sqlite3.Error as e:
+    print(f"Error opening history database '{args.db}': {str(e)}")
+    raise SystemExit(1)
+
+started = time.perf_counter()
+if args.command == "import":
+    failed = 0
+    for path in args.files:
+        snapshot_date = args.date or snapshot_date_from_path(path)
+        if not snapshot_date:
+            print(f"Error importing '{path}': no date in the file name, use --date")
+            failed += 1
+            continue
+        try:
+            kind, num_rows = import_report(db, path, snapshot_date)
+            print(f"Imported {num_rows} {'policy/phase' if kind == 'analyzer' else 'index'} rows from {path} as {snapshot_date}")
+        except Exception as e:
+            print(f"Error importing '{path}': {str(e)}")
+            failed += 1
+    if failed:
+        raise SystemExit(1)
+
+elif args.command == "growth" and args.policy:
+    rows = policy_growth(db, args.policy, args.phase, args.since, args.until)
+    if not rows:
+        print(f"No history for policy '{args.policy}'" + (f" phase '{args.phase}'" if args.phase else ""))
+    else:
+        print(f"{'Date':<12} {'Indices':>8} {'Shards':>8} {'Size':>12} {'Change':>12}")
+        previous = None
+        for snapshot_date, num_indices, total_shards, size_bytes in rows:
+            change = format_change(size_bytes - previous) if previous is not None else ""
+            print(f"{snapshot_date:<12} {num_indices:>8} {total_shards:>8} {format_size(size_bytes):>12} {change:>12}")
+            previous = size_bytes
+        print(f"Total change: {format_change(rows[-1][3] - rows[0][3])} from {rows[0][0]} to {rows[-1][0]}")
+
+elif args.command == "growth":
+    rows = index_growth(db, args.index, args.since, args.until)
+    if not rows:
+        print(f"No history for index '{args.index}'")
+    else:
+        print(f"{'Date':<12} {'Policy':<24} {'Phase':<8} {'Size':>12} {'Documents':>12}")
+        for snapshot_date, policy, phase, size_bytes, doc_count in rows:
+            print(f"{snapshot_date:<12} {policy:<24} {phase:<8} {format_size(size_bytes):>12} {doc_count:>12}")
+
+else:
+    start, end = snapshot_range(db, args.since, args.until)
+    if not start or start == end:
+        print("Need at least two analyzer snapshots in the date range")
+    else:
+        print(f"Top growing policies from {start} to {end}")
+        print(f"{'Policy':<32} {'Start':>12} {'End':>12} {'Change':>12}")
+        for policy, start_bytes, end_bytes in top_growing_policies(db, start, end, args.limit):
+            print(f"{policy:<32} {format_size(start_bytes):>12} {format_size(end_bytes):>12} "
+                  f"{format_change(end_bytes - start_bytes):>12}")
+
+if args.command != "import":
+    print(f"Query took {(time.perf_counter() - started) * 1000:.1f} ms")
+db.close()
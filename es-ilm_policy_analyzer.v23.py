@@ -0,0 +1,370 @@
+import json
+import logging
+import argparse
+import asyncio
+import urllib3
+import warnings
+from es_ilm_collect import (connect, get_auth_header, collect_cluster, collect_cluster_async, ASYNC_ENGINE_AVAILABLE,
+                            ASYNC_ENGINE_MISSING, empty_cluster, load_snapshot)
+from es_ilm_log import setup_logging, log_warning_summary
+from es_ilm_output import (CsvRowWriter, POLICY_ANALYZER_CSV_COLUMNS, JSON_COMPRESSIONS, JSON_COMPRESSION_SUFFIXES,
+                           PARQUET_COMPRESSIONS, INDEX_PARQUET_COLUMNS, ROLLUP_PARQUET_COLUMNS, compression_available,
+                           parquet_available, write_json, write_parquet, rollup_parquet_tables)
+from es_ilm_profile import PROFILE_MODES, DEFAULT_PROFILE_TOP, start_profiling
+from es_ilm_rollup import RollupAggregator
+from es_ilm_timing import RunTimings
+try:
+    from es_ilm_table import build_index_table, rollup_from_table
+except ImportError:  # pandas not installed: only the Python aggregator is available
+    build_index_table = None
+from datetime import datetime, timezone
+
+# Suppress all urllib3 warnings (including TLS-related)
+urllib3.disable_warnings()
+# Suppress warnings from Elasticsearch client
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Elasticsearch ILM Policy Analyzer")
+parser.add_argument("--host", help="Elasticsearch host (e.g., https://localhost:9200)")
+parser.add_argument("--username", help="Elasticsearch username")
+parser.add_argument("--password", help="Elasticsearch password")
+parser.add_argument("--snapshot", help="Report offline from a snapshot written by es-cluster_snapshot instead of querying the cluster")
+parser.add_argument("--explain-mode", choices=["batch", "per-index"], default="batch",
+                    help="Fetch ILM explain data in batched requests, or one request per index (for per-index privileges)")
+parser.add_argument("--engine", choices=["sync", "async"], default="sync",
+                    help="Collect with the synchronous client, or with AsyncElasticsearch and concurrent requests")
+parser.add_argument("--concurrency", type=int, default=8,
+                    help="Maximum number of concurrent requests for per-index mode and the async engine (default: 8)")
+parser.add_argument("--policies", choices=["referenced", "all"], default="referenced",
+                    help="Fetch only the ILM policies used by managed indices (default), or the full policy catalog")
+parser.add_argument("--aggregation", choices=["pandas", "python"], default="pandas",
+                    help="Roll up indices with vectorized pandas groupby (default), or with the single-pass Python aggregator")
+parser.add_argument("--compact", action="store_true",
+                    help="Write the JSON output without indentation")
+parser.add_argument("--compress", choices=JSON_COMPRESSIONS, default="none",
+                    help="Compress the JSON output with gzip (.gz) or zstd (.zst, needs zstandard) (default: none)")
+parser.add_argument("--parquet", action="store_true",
+                    help="Also write the per-index table and the policy, phase, month and day rollups as Parquet files (needs pyarrow)")
+parser.add_argument("--parquet-compression", choices=PARQUET_COMPRESSIONS, default="zstd",
+                    help="Compression codec of the Parquet files (default: zstd)")
+parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
+                    help="Console log level; DEBUG also prints the ILM policy definitions (default: INFO)")
+parser.add_argument("--log-file", help="Also write every log record, unthrottled, to this JSON-lines file")
+parser.add_argument("--max-repeated-warnings", type=int, default=5,
+                    help="Console limit per warning type; further occurrences are only counted (default: 5)")
+parser.add_argument("--profile", choices=PROFILE_MODES,
+                    help="Profile the run: cpu (cProfile, writes a .pstats file) or memory (tracemalloc, writes the top allocation sites to a .memory.txt file)")
+parser.add_argument("--profile-top", type=int, default=DEFAULT_PROFILE_TOP,
+                    help=f"Number of allocation sites in the memory profile (default: {DEFAULT_PROFILE_TOP})")
+args = parser.parse_args()
+if not args.snapshot and not (args.host and args.username and args.password):
+    parser.error("--host, --username and --password are required unless --snapshot is given")
+if args.concurrency < 1:
+    parser.error("--concurrency must be at least 1")
+if args.engine == "async" and not ASYNC_ENGINE_AVAILABLE:
+    parser.error(f"--engine async: {ASYNC_ENGINE_MISSING}")
+if args.max_repeated_warnings < 0:
+    parser.error("--max-repeated-warnings must not be negative")
+if args.profile_top < 1:
+    parser.error("--profile-top must be at least 1")
+if not compression_available(args.compress):
+    parser.error("--compress zstd requires zstandard (pip install zstandard)")
+if args.parquet and not parquet_available():
+    parser.error("--parquet requires pyarrow (pip install pyarrow)")
+
+# Set up leveled logging (console plus optional JSON-lines file)
+log = setup_logging(args.log_level, args.log_file, args.max_repeated_warnings)
+
+# Time every stage of the run and count the requests sent to Elasticsearch
+timings = RunTimings()
+
+# Set output file names based on script name and current date
+current_date = datetime.now().strftime("%Y-%m-%d")
+script_name = "es-ilm_policy_analyzer"
+json_output_file = f"{script_name}_{current_date}.json{JSON_COMPRESSION_SUFFIXES[args.compress]}"
+csv_output_file = f"{script_name}_{current_date}.csv"
+
+# Profile the rest of the run if asked; the profile is written on exit
+if args.profile:
+    start_profiling(args.profile, f"{script_name}_{current_date}", args.profile_top, log.info)
+
+# Function to format bytes to human-readable string
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if bytes >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+# Collect cluster info, indices, ILM explain data and policies
+cat_columns = "index,pri.store.size,pri,rep,creation.date"
+if args.snapshot:
+    # Report offline from a raw snapshot collected once for all reports
+    try:
+        with timings.stage("load_snapshot"):
+            cluster = load_snapshot(args.snapshot, cat_columns, cat_bytes="b")
+        log.info(f"Loaded snapshot {args.snapshot}")
+    except Exception as e:
+        log.error(f"Reading snapshot '{args.snapshot}' failed: {str(e)}")
+        cluster = empty_cluster()
+elif args.engine == "async":
+    cluster = asyncio.run(collect_cluster_async(args.host, args.username, args.password, cat_columns,
+                                                args.explain_mode, args.concurrency, cat_bytes="b",
+                                                policy_scope=args.policies, timings=timings))
+else:
+    # Connect to Elasticsearch, ignoring certificate verification
+    es = connect(args.host, args.username, args.password, args.concurrency, timings.request_stats)
+    cluster = collect_cluster(es, cat_columns, get_auth_header(args.username, args.password),
+                              args.explain_mode, args.concurrency, cat_bytes="b", policy_scope=args.policies,
+                              timings=timings)
+indices = cluster["indices"]
+ilm_explain = cluster["explain"]
+
+# Everything up to the output files is aggregation, except the CSV rows
+# streamed on the way, which are timed as csv_write
+timings.start("aggregation")
+if args.aggregation == "pandas" and build_index_table is None:
+    log.warning("pandas is not installed; using the Python aggregator")
+    args.aggregation = "python"
+
+if args.aggregation == "pandas":
+    # Hold the per-index data as a columnar table and roll it up with groupby
+    index_table = build_index_table(indices, ilm_explain)
+    policy_rollups = rollup_from_table(index_table, format_size)
+else:
+    # Group indices by ILM policy, updating all rollup levels in a single pass
+    rollup = RollupAggregator()
+    for idx in indices:
+        # pri.store.size is requested in bytes (empty for closed indices)
+        size_bytes = int(idx.get("pri.store.size") or 0)
+        
+        index_name = idx["index"]
+        
+        # Look up ILM info from the batched explain results
+        index_ilm = ilm_explain.get(index_name, {})
+        
+        if index_ilm.get("managed", False):
+            policy = index_ilm["policy"]
+            phase = index_ilm.get("phase", "unknown")
+            
+            # Get shard counts
+            pri_shards = int(idx.get("pri") or 0)
+            rep_shards = int(idx.get("rep") or 0)
+            total_shards = pri_shards * (1 + rep_shards)
+            
+            # Get creation date and month from epoch millis
+            creation_millis = int(idx.get("creation.date") or 0)
+            creation_month = "unknown"
+            creation_date = "unknown"
+            if creation_millis:
+                dt = datetime.fromtimestamp(creation_millis / 1000, tz=timezone.utc)
+                creation_month = dt.strftime("%Y-%m")
+                creation_date = dt.strftime("%Y-%m-%d")
+            
+            rollup.add(policy, {
+                "index": index_name,
+                "size_bytes": size_bytes,
+                "size_readable": format_size(size_bytes),
+                "total_shards": total_shards,
+                "phase": phase,
+                "creation_month": creation_month,
+                "creation_date": creation_date,
+                "creation_date_raw": creation_millis
+            })
+    policy_rollups = rollup.policies
+
+# Look up the rollover settings of each analyzed policy in the ILM policies
+# collected with the cluster data (by default only the policies that the
+# explained indices reference, per --policies)
+policy_settings = {}
+try:
+    if cluster["policies_error"]:
+        raise RuntimeError(cluster["policies_error"])
+    all_policies = cluster["policies"]
+    log.info(f"Retrieved {len(all_policies)} ILM policies")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"Full ILM policies response: {json.dumps(all_policies)}")
+    
+    for policy in policy_rollups.keys():
+        log.debug(f"Processing policy: {policy}")
+        if policy not in all_policies:
+            log.warning(f"Policy '{policy}' not found in Elasticsearch", extra={"warning_type": "policy_not_found"})
+            policy_settings[policy] = {"error": "Policy not found"}
+            continue
+        
+        policy_def = all_policies.get(policy, {})
+        inner_policy = policy_def.get('policy', policy_def)  # Handle nested or direct policy structure
+        phases_def = inner_policy.get('phases', {})
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f"Phases for policy '{policy}': {json.dumps(phases_def)}")
+        
+        rollover_settings = {}
+        has_rollover = False
+        for phase, config in phases_def.items():
+            actions = config.get('actions', {})
+            rollover = actions.get('rollover', {"note": "No rollover settings defined"})
+            if "note" not in rollover:
+                has_rollover = True
+            phase_settings = {
+                "lifetime": config.get('min_age', 'Not specified'),
+                "rollover": rollover,
+                "num_indices": 0  # Will be updated later if indices exist
+            }
+            rollover_settings[phase] = phase_settings
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(f"Phase '{phase}' settings: lifetime={phase_settings['lifetime']}, rollover={json.dumps(rollover)}")
+        
+        policy_settings[policy] = rollover_settings
+        if not has_rollover:
+            log.warning(f"No rollover settings found for any phase in policy '{policy}'", extra={"warning_type": "no_rollover"})
+            policy_settings[policy]["note"] = "No phases with rollover settings"
+except Exception as e:
+    log.error(f"Failed to get ILM policies: {str(e)}")
+    for policy in policy_rollups.keys():
+        policy_settings[policy] = {"error": str(e)}
+
+# Calculate stats per group and stream the CSV rows
+results = {}
+csv_writer = timings.timed("csv_write", CsvRowWriter)(csv_output_file, POLICY_ANALYZER_CSV_COLUMNS)
+write_csv_row = timings.timed("csv_write", csv_writer.write)
+for policy, policy_rollup in policy_rollups.items():
+    num_indices = policy_rollup["num_indices"]
+    total_shards = policy_rollup["total_shards"]
+    total_size_bytes = policy_rollup["size_bytes"]
+    
+    phases = {}
+    for phase, p in policy_rollup["phases"].items():
+        phases[phase] = {
+            "num_indices": p["num_indices"],
+            "total_shards": p["total_shards"],
+            "total_size": format_size(p["size_bytes"]),
+            "total_size_bytes": p["size_bytes"],
+            "indices": [
+                {"name": i["index"], "size": i["size_readable"], "shards": i["total_shards"], "creation_date": i["creation_date"]}
+                for i in p["indices"]
+            ]
+        }
+        # Update num_indices in phase_settings
+        if phase in policy_settings.get(policy, {}):
+            policy_settings[policy][phase]["num_indices"] = p["num_indices"]
+    
+    # Monthly breakdown
+    monthly_breakdown = {
+        month: {
+            "num_indices": m["num_indices"],
+            "size": format_size(m["size_bytes"]),
+            "size_bytes": m["size_bytes"]
+        } for month, m in sorted(policy_rollup["months"].items())
+    }
+    
+    # Daily breakdown with phase and indices
+    daily_breakdown = {}
+    for date, phase_dict in sorted(policy_rollup["days"].items()):
+        daily_breakdown[date] = {}
+        for phase, d in phase_dict.items():
+            daily_breakdown[date][phase] = {
+                "num_indices": d["num_indices"],
+                "size": format_size(d["size_bytes"]),
+                "size_bytes": d["size_bytes"],
+                "indices": [
+                    {"name": i["index"], "size": i["size_readable"]}
+                    for i in d["indices"]
+                ]
+            }
+    
+    results[policy] = {
+        "num_indices": num_indices,
+        "total_shards": total_shards,
+        "total_size": format_size(total_size_bytes),
+        "total_size_bytes": total_size_bytes,
+        "phases": phases,
+        "monthly_breakdown": monthly_breakdown,
+        "daily_breakdown": daily_breakdown,
+        "phase_settings": policy_settings.get(policy, {"error": "No settings retrieved"})
+    }
+    
+    # Write CSV rows as they are produced; unset columns are left empty
+    # Policy-level row
+    write_csv_row({
+        "Policy": policy,
+        "Num Indices": num_indices,
+        "Total Shards": total_shards,
+        "Total Size": format_size(total_size_bytes),
+        "Total Size (Bytes)": total_size_bytes
+    })
+    
+    # Phase settings rows
+    phase_settings = policy_settings.get(policy, {"error": "No settings retrieved"})
+    if "error" not in phase_settings and "note" not in phase_settings:
+        for phase, settings in phase_settings.items():
+            write_csv_row({
+                "Policy": policy,
+                "Phase": phase,
+                "Phase Num Indices": settings["num_indices"],
+                "Phase Lifetime": settings["lifetime"],
+                "Phase Rollover": json.dumps(settings["rollover"])
+            })
+    elif "note" in phase_settings:
+        write_csv_row({"Policy": policy, "Phase Rollover": phase_settings["note"]})
+    elif "error" in phase_settings:
+        write_csv_row({"Policy": policy, "Phase Rollover": phase_settings["error"]})
+    
+    # Monthly breakdown rows
+    for month, data in monthly_breakdown.items():
+        write_csv_row({
+            "Policy": policy,
+            "Month": month,
+            "Month Num Indices": data["num_indices"],
+            "Month Size": data["size"],
+            "Month Size (Bytes)": data["size_bytes"]
+        })
+    
+    # Daily breakdown rows with phase
+    for date, phase_dict in daily_breakdown.items():
+        for phase, data in phase_dict.items():
+            write_csv_row({
+                "Policy": policy,
+                "Date": date,
+                "Date Phase": phase,
+                "Date Num Indices": data["num_indices"],
+                "Date Size": data["size"],
+                "Date Size (Bytes)": data["size_bytes"]
+            })
+
+timings.stop()
+
+# Finish the CSV file
+with timings.stage("csv_write"):
+    csv_writer.close()
+if csv_writer.error:
+    log.error(f"Writing to CSV file '{csv_output_file}' failed: {csv_writer.error}")
+else:
+    log.info(f"Results written to {csv_output_file}")
+
+# Output results to JSON file, with the timings of the run so far (the JSON
+# write itself is only in the summary line at the end)
+results["_meta"] = {"timings": timings.as_dict()}
+try:
+    with timings.stage("json_write"):
+        write_json(json_output_file, results, args.compact, args.compress)
+    log.info(f"Results written to {json_output_file}")
+except Exception as e:
+    log.error(f"Writing to JSON file '{json_output_file}' failed: {str(e)}")
+
+# Output the per-index table and the rollup tables to Parquet files
+if args.parquet:
+    report_date = datetime.now().date()
+    for table_name, table in rollup_parquet_tables(policy_rollups).items():
+        parquet_output_file = f"{script_name}_{current_date}.{table_name}.parquet"
+        column_types = INDEX_PARQUET_COLUMNS if table_name == "indices" else ROLLUP_PARQUET_COLUMNS[table_name]
+        try:
+            with timings.stage("parquet_write"):
+                write_parquet(parquet_output_file, table, column_types, args.parquet_compression, report_date)
+            log.info(f"Results written to {parquet_output_file}")
+        except Exception as e:
+            log.error(f"Writing to Parquet file '{parquet_output_file}' failed: {str(e)}")
+
+# Report warnings that were rate limited on the console, and where the time went
+log_warning_summary()
+log.info(timings.summary_line())
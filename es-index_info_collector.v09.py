@@ -0,0 +1,166 @@
+import json
+import argparse
+import asyncio
+from collections import defaultdict
+import urllib3
+import warnings
+from es_ilm_collect import (connect, get_auth_header, collect_cluster, collect_cluster_async, ASYNC_ENGINE_AVAILABLE,
+                            ASYNC_ENGINE_MISSING, empty_cluster, load_snapshot)
+from es_ilm_output import (CsvRowWriter, NdjsonWriter, COLLECTOR_CSV_COLUMNS, PARQUET_COMPRESSIONS,
+                           COLLECTOR_PARQUET_COLUMNS, parquet_available, write_parquet)
+from datetime import datetime, timezone
+
+# Suppress all urllib3 warnings (including TLS-related)
+urllib3.disable_warnings()
+# Suppress warnings from Elasticsearch client
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Elasticsearch Index Info Collector")
+parser.add_argument("--host", help="Elasticsearch host (e.g., https://localhost:9200)")
+parser.add_argument("--username", help="Elasticsearch username")
+parser.add_argument("--password", help="Elasticsearch password")
+parser.add_argument("--snapshot", help="Report offline from a snapshot written by es-cluster_snapshot instead of querying the cluster")
+parser.add_argument("--engine", choices=["sync", "async"], default="sync",
+                    help="Collect with the synchronous client, or with AsyncElasticsearch and concurrent requests")
+parser.add_argument("--concurrency", type=int, default=8,
+                    help="Maximum number of concurrent requests for the async engine (default: 8)")
+parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                    help="Write the index records as one JSON array, or stream them as NDJSON, one compact record per line")
+parser.add_argument("--parquet", action="store_true",
+                    help="Also write the per-index table as a Parquet file (needs pyarrow)")
+parser.add_argument("--parquet-compression", choices=PARQUET_COMPRESSIONS, default="zstd",
+                    help="Compression codec of the Parquet file (default: zstd)")
+args = parser.parse_args()
+if not args.snapshot and not (args.host and args.username and args.password):
+    parser.error("--host, --username and --password are required unless --snapshot is given")
+if args.concurrency < 1:
+    parser.error("--concurrency must be at least 1")
+if args.engine == "async" and not ASYNC_ENGINE_AVAILABLE:
+    parser.error(f"--engine async: {ASYNC_ENGINE_MISSING}")
+if args.parquet and not parquet_available():
+    parser.error("--parquet requires pyarrow (pip install pyarrow)")
+
+# Set output file names based on script name and current date
+current_date = datetime.now().strftime("%Y-%m-%d")
+script_name = "es-index_info_collector"
+json_output_file = f"{script_name}_{current_date}.json"
+ndjson_output_file = f"{script_name}_{current_date}.ndjson"
+csv_output_file = f"{script_name}_{current_date}.csv"
+parquet_output_file = f"{script_name}_{current_date}.parquet"
+
+# Function to format bytes to human-readable string
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if bytes >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+# Collect cluster info, indices and ILM explain data
+cat_columns = "index,pri.store.size,docs.count,creation.date"
+if args.snapshot:
+    # Report offline from a raw snapshot collected once for all reports
+    try:
+        cluster = load_snapshot(args.snapshot, cat_columns, cat_bytes="b")
+        print(f"Loaded snapshot {args.snapshot}")
+    except Exception as e:
+        print(f"Error reading snapshot '{args.snapshot}': {str(e)}")
+        cluster = empty_cluster()
+elif args.engine == "async":
+    cluster = asyncio.run(collect_cluster_async(args.host, args.username, args.password, cat_columns,
+                                                concurrency=args.concurrency, fetch_policies=False, cat_bytes="b"))
+else:
+    # Connect to Elasticsearch, ignoring certificate verification
+    es = connect(args.host, args.username, args.password)
+    cluster = collect_cluster(es, cat_columns, get_auth_header(args.username, args.password),
+                              fetch_policies=False, cat_bytes="b")
+indices = cluster["indices"]
+ilm_explain = cluster["explain"]
+
+# Collect index information, streaming each record to the NDJSON and CSV
+# files as soon as it is joined with its explain data. Records are only kept
+# in memory for the JSON array and Parquet outputs.
+ndjson_writer = NdjsonWriter(ndjson_output_file) if args.format == "ndjson" else None
+csv_writer = CsvRowWriter(csv_output_file, COLLECTOR_CSV_COLUMNS)
+keep_results = args.format == "json" or args.parquet
+results = []
+for idx in indices:
+    # pri.store.size is requested in bytes (empty for closed indices)
+    size_bytes = int(idx.get("pri.store.size") or 0)
+    
+    index_name = idx["index"]
+    
+    # Look up ILM info from the batched explain results
+    index_ilm = ilm_explain.get(index_name, {})
+    
+    if index_ilm.get("managed", False):
+        policy = index_ilm["policy"]
+        phase = index_ilm.get("phase", "unknown")
+        
+        # Get creation date from epoch millis
+        creation_millis = int(idx.get("creation.date") or 0)
+        creation_date = "unknown"
+        if creation_millis:
+            dt = datetime.fromtimestamp(creation_millis / 1000, tz=timezone.utc)
+            creation_date = dt.strftime("%Y-%m-%d")
+        
+        # Get document count
+        doc_count = int(idx.get("docs.count") or 0)
+        
+        record = {
+            "index": index_name,
+            "policy": policy,
+            "phase": phase,
+            "size": format_size(size_bytes),
+            "size_bytes": size_bytes,
+            "creation_date": creation_date,
+            "doc_count": doc_count
+        }
+        if ndjson_writer is not None:
+            ndjson_writer.write(record)
+        csv_writer.write({
+            "Index": index_name,
+            "Policy": policy,
+            "Phase": phase,
+            "Size": record["size"],
+            "Size (Bytes)": size_bytes,
+            "Creation Date": creation_date,
+            "Document Count": doc_count
+        })
+        if keep_results:
+            results.append(record)
+
+# Output results to JSON file
+if args.format == "json":
+    try:
+        with open(json_output_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {json_output_file}")
+    except Exception as e:
+        print(f"Error writing to JSON file '{json_output_file}': {str(e)}")
+
+# Finish the NDJSON file
+if ndjson_writer is not None:
+    ndjson_writer.close()
+    if ndjson_writer.error:
+        print(f"Error writing to NDJSON file '{ndjson_output_file}': {ndjson_writer.error}")
+    else:
+        print(f"Results written to {ndjson_output_file}")
+
+# Finish the CSV file
+csv_writer.close()
+if csv_writer.error:
+    print(f"Error writing to CSV file '{csv_output_file}': {csv_writer.error}")
+else:
+    print(f"Results written to {csv_output_file}")
+
+# Output results to Parquet file
+if args.parquet:
+    try:
+        table = {name: [r[name] for r in results] for name in COLLECTOR_PARQUET_COLUMNS}
+        write_parquet(parquet_output_file, table, COLLECTOR_PARQUET_COLUMNS, args.parquet_compression,
+                      datetime.now().date())
+        print(f"Results written to {parquet_output_file}")
+    except Exception as e:
+        print(f"Error writing to Parquet file '{parquet_output_file}': {str(e)}")
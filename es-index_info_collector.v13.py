@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+from collections import defaultdict
+import urllib3
+import warnings
+from es_ilm_collect import (connect, get_auth_header, collect_cluster, collect_cluster_async, ASYNC_ENGINE_AVAILABLE,
+                            ASYNC_ENGINE_MISSING, empty_cluster, load_snapshot)
+from es_ilm_metrics import (DEFAULT_METRICS_INDEX, METRICS_MODES, metrics_documents, ensure_metrics_index,
+                            bulk_index_metrics)
+from es_ilm_output import (CsvRowWriter, NdjsonWriter, COLLECTOR_CSV_COLUMNS, JSON_COMPRESSIONS,
+                           JSON_COMPRESSION_SUFFIXES, PARQUET_COMPRESSIONS, COLLECTOR_PARQUET_COLUMNS,
+                           compression_available, parquet_available, write_json, write_parquet)
+from es_ilm_timing import RunTimings
+from datetime import datetime, timezone
+
+# Suppress all urllib3 warnings (including TLS-related)
+urllib3.disable_warnings()
+# Suppress warnings from Elasticsearch client
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Elasticsearch Index Info Collector")
+parser.add_argument("--host", help="Elasticsearch host (e.g., https://localhost:9200)")
+parser.add_argument("--username", help="Elasticsearch username")
+parser.add_argument("--password", help="Elasticsearch password")
+parser.add_argument("--snapshot", help="Report offline from a snapshot written by es-cluster_snapshot instead of querying the cluster")
+parser.add_argument("--engine", choices=["sync", "async"], default="sync",
+                    help="Collect with the synchronous client, or with AsyncElasticsearch and concurrent requests")
+parser.add_argument("--concurrency", type=int, default=8,
+                    help="Maximum number of concurrent requests for the async engine (default: 8)")
+parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                    help="Write the index records as one JSON array, or stream them as NDJSON, one compact record per line")
+parser.add_argument("--compact", action="store_true",
+                    help="Write the JSON output without indentation")
+parser.add_argument("--compress", choices=JSON_COMPRESSIONS, default="none",
+                    help="Compress the JSON or NDJSON output with gzip (.gz) or zstd (.zst, needs zstandard) (default: none)")
+parser.add_argument("--parquet", action="store_true",
+                    help="Also write the per-index table as a Parquet file (needs pyarrow)")
+parser.add_argument("--parquet-compression", choices=PARQUET_COMPRESSIONS, default="zstd",
+                    help="Compression codec of the Parquet file (default: zstd)")
+parser.add_argument("--bulk-index", nargs="?", const=DEFAULT_METRICS_INDEX,
+                    help=f"Also bulk-index the records into this metrics index for the Kibana dashboard (default: {DEFAULT_METRICS_INDEX})")
+parser.add_argument("--metrics-host",
+                    help="Elasticsearch host of the metrics index (default: --host); uses the same credentials")
+parser.add_argument("--metrics-mode", choices=METRICS_MODES, default="tsds",
+                    help="Write metrics to a time series data stream with downsampling ILM (default), or to a plain index")
+args = parser.parse_args()
+if not args.snapshot and not (args.host and args.username and args.password):
+    parser.error("--host, --username and --password are required unless --snapshot is given")
+if args.concurrency < 1:
+    parser.error("--concurrency must be at least 1")
+if args.engine == "async" and not ASYNC_ENGINE_AVAILABLE:
+    parser.error(f"--engine async: {ASYNC_ENGINE_MISSING}")
+if args.bulk_index and not ((args.metrics_host or args.host) and args.username and args.password):
+    parser.error("--bulk-index needs --username, --password and --host or --metrics-host")
+if not compression_available(args.compress):
+    parser.error("--compress zstd requires zstandard (pip install zstandard)")
+if args.parquet and not parquet_available():
+    parser.error("--parquet requires pyarrow (pip install pyarrow)")
+
+# Set output file names based on script name and current date
+current_date = datetime.now().strftime("%Y-%m-%d")
+script_name = "es-index_info_collector"
+json_output_file = f"{script_name}_{current_date}.json{JSON_COMPRESSION_SUFFIXES[args.compress]}"
+ndjson_output_file = f"{script_name}_{current_date}.ndjson{JSON_COMPRESSION_SUFFIXES[args.compress]}"
+csv_output_file = f"{script_name}_{current_date}.csv"
+parquet_output_file = f"{script_name}_{current_date}.parquet"
+meta_output_file = f"{script_name}_{current_date}.meta.json"
+
+# Function to format bytes to human-readable string
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if bytes >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+# Time every stage of the run and count the requests sent to Elasticsearch
+timings = RunTimings()
+
+# Collect cluster info, indices and ILM explain data
+cat_columns = "index,pri.store.size,pri,rep,docs.count,creation.date"
+if args.snapshot:
+    # Report offline from a raw snapshot collected once for all reports
+    try:
+        with timings.stage("load_snapshot"):
+            cluster = load_snapshot(args.snapshot, cat_columns, cat_bytes="b")
+        print(f"Loaded snapshot {args.snapshot}")
+    except Exception as e:
+        print(f"Error reading snapshot '{args.snapshot}': {str(e)}")
+        cluster = empty_cluster()
+elif args.engine == "async":
+    cluster = asyncio.run(collect_cluster_async(args.host, args.username, args.password, cat_columns,
+                                                concurrency=args.concurrency, fetch_policies=False, cat_bytes="b",
+                                                timings=timings))
+else:
+    # Connect to Elasticsearch, ignoring certificate verification
+    es = connect(args.host, args.username, args.password, request_stats=timings.request_stats)
+    cluster = collect_cluster(es, cat_columns, get_auth_header(args.username, args.password),
+                              fetch_policies=False, cat_bytes="b", timings=timings)
+indices = cluster["indices"]
+ilm_explain = cluster["explain"]
+
+# Collect index information, streaming each record to the NDJSON and CSV
+# files as soon as it is joined with its explain data. Records are only kept
+# in memory for the JSON array and Parquet outputs. The streamed rows are
+# timed as json_write and csv_write, the rest of the loop as aggregation.
+timings.start("aggregation")
+ndjson_writer = timings.timed("json_write", NdjsonWriter)(ndjson_output_file, compression=args.compress) if args.format == "ndjson" else None
+csv_writer = timings.timed("csv_write", CsvRowWriter)(csv_output_file, COLLECTOR_CSV_COLUMNS)
+write_ndjson_record = timings.timed("json_write", ndjson_writer.write) if ndjson_writer is not None else None
+write_csv_row = timings.timed("csv_write", csv_writer.write)
+keep_results = args.format == "json" or args.parquet
+results = []
+for idx in indices:
+    # pri.store.size is requested in bytes (empty for closed indices)
+    size_bytes = int(idx.get("pri.store.size") or 0)
+    
+    index_name = idx["index"]
+    
+    # Look up ILM info from the batched explain results
+    index_ilm = ilm_explain.get(index_name, {})
+    
+    if index_ilm.get("managed", False):
+        policy = index_ilm["policy"]
+        phase = index_ilm.get("phase", "unknown")
+        
+        # Get creation date from epoch millis
+        creation_millis = int(idx.get("creation.date") or 0)
+        creation_date = "unknown"
+        if creation_millis:
+            dt = datetime.fromtimestamp(creation_millis / 1000, tz=timezone.utc)
+            creation_date = dt.strftime("%Y-%m-%d")
+        
+        # Get document count
+        doc_count = int(idx.get("docs.count") or 0)
+        
+        record = {
+            "index": index_name,
+            "policy": policy,
+            "phase": phase,
+            "size": format_size(size_bytes),
+            "size_bytes": size_bytes,
+            "creation_date": creation_date,
+            "doc_count": doc_count
+        }
+        if write_ndjson_record is not None:
+            write_ndjson_record(record)
+        write_csv_row({
+            "Index": index_name,
+            "Policy": policy,
+            "Phase": phase,
+            "Size": record["size"],
+            "Size (Bytes)": size_bytes,
+            "Creation Date": creation_date,
+            "Document Count": doc_count
+        })
+        if keep_results:
+            results.append(record)
+timings.stop()
+
+# Output results to JSON file
+if args.format == "json":
+    try:
+        with timings.stage("json_write"):
+            write_json(json_output_file, results, args.compact, args.compress)
+        print(f"Results written to {json_output_file}")
+    except Exception as e:
+        print(f"Error writing to JSON file '{json_output_file}': {str(e)}")
+
+# Finish the NDJSON file
+if ndjson_writer is not None:
+    with timings.stage("json_write"):
+        ndjson_writer.close()
+    if ndjson_writer.error:
+        print(f"Error writing to NDJSON file '{ndjson_output_file}': {ndjson_writer.error}")
+    else:
+        print(f"Results written to {ndjson_output_file}")
+
+# Finish the CSV file
+with timings.stage("csv_write"):
+    csv_writer.close()
+if csv_writer.error:
+    print(f"Error writing to CSV file '{csv_output_file}': {csv_writer.error}")
+else:
+    print(f"Results written to {csv_output_file}")
+
+# Output results to Parquet file
+if args.parquet:
+    try:
+        with timings.stage("parquet_write"):
+            table = {name: [r[name] for r in results] for name in COLLECTOR_PARQUET_COLUMNS}
+            write_parquet(parquet_output_file, table, COLLECTOR_PARQUET_COLUMNS, args.parquet_compression,
+                          datetime.now().date())
+        print(f"Results written to {parquet_output_file}")
+    except Exception as e:
+        print(f"Error writing to Parquet file '{parquet_output_file}': {str(e)}")
+
+# Bulk-index the records into the metrics index, stamped with the collection time
+if args.bulk_index:
+    collected_at = cluster.get("collected_at") or datetime.now(timezone.utc).isoformat()
+    try:
+        if args.metrics_host or args.snapshot or args.engine == "async":
+            es = connect(args.metrics_host or args.host, args.username, args.password)
+        with timings.stage("bulk_index"):
+            ensure_metrics_index(es, args.bulk_index, args.metrics_mode)
+            indexed, failed = bulk_index_metrics(es, metrics_documents(indices, ilm_explain), collected_at, args.bulk_index)
+        print(f"Indexed {indexed} metrics documents into {args.bulk_index}" + (f", {failed} failed" if failed else ""))
+    except Exception as e:
+        print(f"Error indexing metrics into '{args.bulk_index}': {str(e)}")
+
+# The JSON output is an array of index records, so the timings of the run go
+# to a separate _meta file next to it, followed by the summary line
+try:
+    write_json(meta_output_file, {"_meta": {"timings": timings.as_dict()}})
+    print(f"Timings written to {meta_output_file}")
+except Exception as e:
+    print(f"Error writing to JSON file '{meta_output_file}': {str(e)}")
+print(timings.summary_line())
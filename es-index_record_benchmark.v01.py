@@ -0,0 +1,142 @@
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from es_ilm_rollup import IndexRecord, RollupAggregator
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Benchmark the memory of the analyzer's per-index records: dicts vs IndexRecord")
+parser.add_argument("--indices", type=int, default=100000, help="Number of synthetic indices (default: 100000)")
+parser.add_argument("--policies", type=int, default=20, help="Number of synthetic ILM policies (default: 20)")
+parser.add_argument("--days", type=int, default=730, help="Spread of index creation dates in days (default: 730)")
+parser.add_argument("--output", help="Also write the results table as JSON to this file")
+args = parser.parse_args()
+if args.indices < 1 or args.policies < 1 or args.days < 1:
+    parser.error("--indices, --policies and --days must be at least 1")
+
+# Function to format bytes to human-readable string
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if bytes >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+# Function to build synthetic cat.indices rows (bytes=b) and explain entries
+def synthetic_cluster(num_indices, num_policies, num_days):
+    rng = random.Random(42)
+    start = 1704067200000  # 2024-01-01T00:00:00Z
+    indices = []
+    explain = {}
+    for i in range(num_indices):
+        name = f".ds-logs-app{i % 500:03d}-{i:06d}"
+        indices.append({
+            "index": name,
+            "pri.store.size": str(rng.randrange(1, 50 * 1024**3)),
+            "pri": str(rng.choice([1, 2, 3])),
+            "rep": "1",
+            "creation.date": str(start + rng.randrange(num_days * 86400) * 1000),
+        })
+        explain[name] = {"managed": True, "policy": f"policy-{i % num_policies:03d}",
+                         "phase": rng.choice(["hot", "warm", "cold", "frozen"])}
+    return indices, explain
+
+# Function to roll up the cluster with dict records, as the analyzer did up to v23
+def rollup_dicts(indices, explain):
+    rollup = RollupAggregator()
+    for idx in indices:
+        size_bytes = int(idx.get("pri.store.size") or 0)
+        index_ilm = explain.get(idx["index"], {})
+        creation_millis = int(idx.get("creation.date") or 0)
+        creation_month = "unknown"
+        creation_date = "unknown"
+        if creation_millis:
+            dt = datetime.fromtimestamp(creation_millis / 1000, tz=timezone.utc)
+            creation_month = dt.strftime("%Y-%m")
+            creation_date = dt.strftime("%Y-%m-%d")
+        rollup.add(index_ilm["policy"], {
+            "index": idx["index"],
+            "size_bytes": size_bytes,
+            "size_readable": format_size(size_bytes),
+            "total_shards": int(idx.get("pri") or 0) * (1 + int(idx.get("rep") or 0)),
+            "phase": index_ilm.get("phase", "unknown"),
+            "creation_month": creation_month,
+            "creation_date": creation_date,
+            "creation_date_raw": creation_millis
+        })
+    return rollup.policies
+
+# Function to roll up the cluster with IndexRecords, as the analyzer does from v24
+def rollup_records(indices, explain):
+    rollup = RollupAggregator()
+    for idx in indices:
+        index_ilm = explain.get(idx["index"], {})
+        rollup.add(index_ilm["policy"], IndexRecord(
+            idx["index"],
+            int(idx.get("pri.store.size") or 0),
+            int(idx.get("pri") or 0) * (1 + int(idx.get("rep") or 0)),
+            index_ilm.get("phase", "unknown"),
+            int(idx.get("creation.date") or 0)))
+    return rollup.policies
+
+# Function to build the per-phase index listings of the JSON output
+def phase_listings(policy_rollups, records_are_dicts):
+    listings = []
+    for rollup in policy_rollups.values():
+        for p in rollup["phases"].values():
+            if records_are_dicts:
+                listings.append([{"name": i["index"], "size": i["size_readable"], "shards": i["total_shards"],
+                                  "creation_date": i["creation_date"]} for i in p["indices"]])
+            else:
+                listings.append([{"name": i.index, "size": format_size(i.size_bytes), "shards": i.total_shards,
+                                  "creation_date": i.creation_date} for i in p["indices"]])
+    return listings
+
+print(f"Building synthetic cluster: {args.indices} indices, {args.policies} policies, {args.days} days")
+indices, explain = synthetic_cluster(args.indices, args.policies, args.days)
+
+# Measure the memory the rollups (and the records they hold) add on top of
+# the cat rows (traced in a separate run, as tracemalloc slows it down), and
+# the time to aggregate and to build the listings
+rows = []
+for record_type, aggregate in (("dict", rollup_dicts), ("IndexRecord", rollup_records)):
+    gc.collect()
+    tracemalloc.start()
+    policy_rollups = aggregate(indices, explain)
+    gc.collect()
+    rollup_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del policy_rollups
+    gc.collect()
+    started = time.perf_counter()
+    policy_rollups = aggregate(indices, explain)
+    aggregate_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    phase_listings(policy_rollups, record_type == "dict")
+    listing_seconds = time.perf_counter() - started
+    rows.append({
+        "record_type": record_type,
+        "rollup_bytes": rollup_bytes,
+        "bytes_per_index": round(rollup_bytes / args.indices),
+        "aggregate_seconds": round(aggregate_seconds, 3),
+        "listing_seconds": round(listing_seconds, 3),
+    })
+    del policy_rollups
+
+# Print the results table, relative to dict records
+baseline = rows[0]
+print(f"{'record':<12} {'rollups MB':>11} {'B/index':>8} {'memory %':>9} {'aggregate s':>12} {'listings s':>11}")
+for row in rows:
+    memory_pct = 100 * row["rollup_bytes"] / baseline["rollup_bytes"]
+    print(f"{row['record_type']:<12} {row['rollup_bytes'] / 1024**2:>11.1f} {row['bytes_per_index']:>8} "
+          f"{memory_pct:>8.1f}% {row['aggregate_seconds']:>12.3f} {row['listing_seconds']:>11.3f}")
+
+if args.output:
+    try:
+        with open(args.output, 'w') as f:
+            json.dump({"indices": args.indices, "policies": args.policies, "days": args.days, "results": rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+    except Exception as e:
+        print(f"Error writing to JSON file '{args.output}': {str(e)}")
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from es_ilm_output import JSON_COMPRESSIONS, JSON_COMPRESSION_SUFFIXES, compression_available, orjson, write_json
+from es_ilm_rollup import RollupAggregator
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Benchmark the JSON output backends on a synthetic ILM analyzer result")
+parser.add_argument("--indices", type=int, default=50000, help="Number of synthetic indices (default: 50000)")
+parser.add_argument("--policies", type=int, default=20, help="Number of synthetic ILM policies (default: 20)")
+parser.add_argument("--days", type=int, default=730, help="Spread of index creation dates in days (default: 730)")
+parser.add_argument("--repeat", type=int, default=3, help="Runs per combination; the fastest is reported (default: 3)")
+parser.add_argument("--output", help="Also write the results table as JSON to this file")
+args = parser.parse_args()
+if args.indices < 1 or args.policies < 1 or args.days < 1 or args.repeat < 1:
+    parser.error("--indices, --policies, --days and --repeat must be at least 1")
+
+# Function to format bytes to human-readable string
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if bytes >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+# Function to build a synthetic result shaped like the ILM policy analyzer's
+# JSON output (phases with per-index listings, monthly and daily breakdowns)
+def synthetic_result(num_indices, num_policies, num_days):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rollup = RollupAggregator()
+    for i in range(num_indices):
+        created = start + timedelta(days=rng.randrange(num_days))
+        size_bytes = rng.randrange(1, 50 * 1024**3)
+        rollup.add(f"policy-{i % num_policies:03d}", {
+            "index": f".ds-logs-app{i % 500:03d}-{created:%Y.%m.%d}-{i:06d}",
+            "size_bytes": size_bytes,
+            "size_readable": format_size(size_bytes),
+            "total_shards": rng.choice([1, 2, 4, 6]),
+            "phase": rng.choice(["hot", "warm", "cold", "frozen"]),
+            "creation_month": created.strftime("%Y-%m"),
+            "creation_date": created.strftime("%Y-%m-%d"),
+        })
+
+    results = {}
+    for policy, r in rollup.policies.items():
+        results[policy] = {
+            "num_indices": r["num_indices"],
+            "total_shards": r["total_shards"],
+            "total_size": format_size(r["size_bytes"]),
+            "total_size_bytes": r["size_bytes"],
+            "phases": {
+                phase: {
+                    "num_indices": p["num_indices"],
+                    "total_shards": p["total_shards"],
+                    "total_size": format_size(p["size_bytes"]),
+                    "total_size_bytes": p["size_bytes"],
+                    "indices": [
+                        {"name": i["index"], "size": i["size_readable"], "shards": i["total_shards"],
+                         "creation_date": i["creation_date"]}
+                        for i in p["indices"]
+                    ]
+                } for phase, p in r["phases"].items()
+            },
+            "monthly_breakdown": {
+                month: {"num_indices": m["num_indices"], "size": format_size(m["size_bytes"]), "size_bytes": m["size_bytes"]}
+                for month, m in sorted(r["months"].items())
+            },
+            "daily_breakdown": {
+                day: {
+                    phase: {
+                        "num_indices": d["num_indices"],
+                        "size": format_size(d["size_bytes"]),
+                        "size_bytes": d["size_bytes"],
+                        "indices": [{"name": i["index"], "size": i["size_readable"]} for i in d["indices"]]
+                    } for phase, d in phase_dict.items()
+                } for day, phase_dict in sorted(r["days"].items())
+            },
+        }
+    return results
+
+print(f"Building synthetic result: {args.indices} indices, {args.policies} policies, {args.days} days")
+result = synthetic_result(args.indices, args.policies, args.days)
+
+backends = ["json"] + (["orjson"] if orjson is not None else [])
+compressions = [c for c in JSON_COMPRESSIONS if compression_available(c)]
+if orjson is None:
+    print("orjson is not installed; benchmarking the json module only")
+if "zstd" not in compressions:
+    print("zstandard is not installed; skipping zstd")
+
+# Time every backend, layout and compression combination
+rows = []
+with tempfile.TemporaryDirectory() as tmp:
+    for backend in backends:
+        for compact in (False, True):
+            for compression in compressions:
+                path = os.path.join(tmp, f"result.json{JSON_COMPRESSION_SUFFIXES[compression]}")
+                best = None
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    write_json(path, result, compact, compression, backend)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                rows.append({
+                    "backend": backend,
+                    "layout": "compact" if compact else "indent",
+                    "compression": compression,
+                    "write_seconds": round(best, 4),
+                    "file_bytes": os.path.getsize(path),
+                })
+
+# Print the results table, relative to the json module with indent=2
+baseline = rows[0]
+print(f"{'backend':<8} {'layout':<8} {'compression':<12} {'write s':>9} {'speedup':>8} {'size MB':>9} {'size %':>7}")
+for row in rows:
+    speedup = baseline["write_seconds"] / row["write_seconds"] if row["write_seconds"] else 0
+    size_pct = 100 * row["file_bytes"] / baseline["file_bytes"]
+    print(f"{row['backend']:<8} {row['layout']:<8} {row['compression']:<12} {row['write_seconds']:>9.3f} "
+          f"{speedup:>7.1f}x {row['file_bytes'] / 1024**2:>9.1f} {size_pct:>6.1f}%")
+
+if args.output:
+    try:
+        with open(args.output, 'w') as f:
+            json.dump({"indices": args.indices, "policies": args.policies, "days": args.days, "results": rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+    except Exception as e:
+        print(f"Error writing to JSON file '{args.output}': {str(e)}")
@@ -1,5 +1,23 @@
 #!/bin/bash
 
+# Optional: profile the snapshot and report scripts with ES_ILM_PROFILE=cpu
+# or ES_ILM_PROFILE=memory, e.g. `ES_ILM_PROFILE=cpu ./es-python-container.sh`.
+# The .pstats / .memory.txt files are copied out next to the reports.
+PROFILE="${ES_ILM_PROFILE:-}"
+if [[ -n "$PROFILE" && "$PROFILE" != "cpu" && "$PROFILE" != "memory" ]]; then
+  echo "Error: ES_ILM_PROFILE must be cpu or memory"
+  exit 1
+fi
+PROFILE_ARGS=()
+if [ -n "$PROFILE" ]; then
+  PROFILE_ARGS=(--profile "$PROFILE")
+  if [ "$PROFILE" = "cpu" ]; then
+    PROFILE_SUFFIX="pstats"
+  else
+    PROFILE_SUFFIX="memory.txt"
+  fi
+fi
+
 # Prompt for environment
 read -p "Enter environment (e.g., prd, qa, dev): " ENVIRONMENT
 if [ -z "$ENVIRONMENT" ]; then
@@ -46,10 +64,34 @@ HOST="${PROTOCOL}://${HOSTNAME}:${PORT}"
 IMAGE_NAME="quay.io/nwlterry/es-python-alpine:0.3"
 CONTAINER_NAME="es-python_temp_container"
 CURRENT_DATE=$(date +%Y-%m-%d)
+SNAPSHOT_SCRIPT_NAME="es-cluster_snapshot.py"
+SNAPSHOT_FILE="/app/es-cluster_snapshot_${CURRENT_DATE}.json.gz"
+LOCAL_SNAPSHOT_DEST="./${ENVIRONMENT}_es-cluster_snapshot_${CURRENT_DATE}.json.gz"
+STATE_FILE="/app/es-cluster_state.json.gz"
+LOCAL_STATE_FILE="./${ENVIRONMENT}_es-cluster_state.json.gz"
 SCRIPTS=(
   "es-index_info_collector.py:es-index_info_collector"
   "es-ilm_policy_analyzer.py:es-ilm_policy_analyzer"
 )
+SHARED_MODULES=(
+  "es_ilm_collect.py"
+  "es_ilm_incremental.py"
+  "es_ilm_log.py"
+  "es_ilm_metrics.py"
+  "es_ilm_output.py"
+  "es_ilm_profile.py"
+  "es_ilm_rollup.py"
+  "es_ilm_table.py"
+  "es_ilm_timing.py"
+)
+# Script versions from this checkout that match the shared modules above,
+# copied into /app under the names the stages below run, so the scripts
+# baked into the image are never paired with newer modules
+SCRIPT_FILES=(
+  "es-cluster_snapshot.v03.py:$SNAPSHOT_SCRIPT_NAME"
+  "es-index_info_collector.v16.py:es-index_info_collector.py"
+  "es-ilm_policy_analyzer.v25.py:es-ilm_policy_analyzer.py"
+)
 
 # Start the container in detached mode
 podman run -d --name "$CONTAINER_NAME" "$IMAGE_NAME" sleep infinity
@@ -58,7 +100,83 @@ if [ $? -ne 0 ]; then
   exit 1
 fi
 
-# Run each script and copy output files
+# Copy shared helper modules next to the scripts in the container
+for module_file in "${SHARED_MODULES[@]}"; do
+  podman cp "./$module_file" "$CONTAINER_NAME:/app/$module_file"
+  if [ $? -ne 0 ]; then
+    echo "Error: Failed to copy $module_file into container"
+    podman rm -f "$CONTAINER_NAME"
+    exit 1
+  fi
+done
+
+# Copy the matching script versions into the container
+for script_file in "${SCRIPT_FILES[@]}"; do
+  LOCAL_SCRIPT="${script_file%%:*}"
+  CONTAINER_SCRIPT="${script_file##*:}"
+  podman cp "./$LOCAL_SCRIPT" "$CONTAINER_NAME:/app/$CONTAINER_SCRIPT"
+  if [ $? -ne 0 ]; then
+    echo "Error: Failed to copy $LOCAL_SCRIPT into container as /app/$CONTAINER_SCRIPT"
+    podman rm -f "$CONTAINER_NAME"
+    exit 1
+  fi
+done
+
+# Collect stage: query the cluster once and write a raw snapshot
+podman exec "$CONTAINER_NAME" test -f "/app/$SNAPSHOT_SCRIPT_NAME"
+if [ $? -ne 0 ]; then
+  echo "Error: Python script /app/$SNAPSHOT_SCRIPT_NAME not found in container"
+  podman rm -f "$CONTAINER_NAME"
+  exit 1
+fi
+
+# Incremental explain: reuse the state of the previous run for this environment, if any
+if [ -f "$LOCAL_STATE_FILE" ]; then
+  podman cp "$LOCAL_STATE_FILE" "$CONTAINER_NAME:$STATE_FILE"
+  if [ $? -ne 0 ]; then
+    echo "Error: Failed to copy state file $LOCAL_STATE_FILE into container, explaining all indices"
+  fi
+fi
+
+echo "Running $SNAPSHOT_SCRIPT_NAME in container..."
+podman exec -it "$CONTAINER_NAME" python "/app/$SNAPSHOT_SCRIPT_NAME" \
+  --host "$HOST" --username "$USERNAME" --password "$PASSWORD" --output "$SNAPSHOT_FILE" --state "$STATE_FILE" \
+  "${PROFILE_ARGS[@]}"
+if [ $? -ne 0 ]; then
+  echo "Error: Failed to run $SNAPSHOT_SCRIPT_NAME"
+  podman rm -f "$CONTAINER_NAME"
+  exit 1
+fi
+
+# Keep the updated state for the next run
+podman cp "$CONTAINER_NAME:$STATE_FILE" "$LOCAL_STATE_FILE"
+if [ $? -eq 0 ]; then
+  echo "State file copied to $LOCAL_STATE_FILE"
+else
+  echo "Error: Failed to copy state file $STATE_FILE from container"
+fi
+
+# Copy snapshot file from container to local system
+podman cp "$CONTAINER_NAME:$SNAPSHOT_FILE" "$LOCAL_SNAPSHOT_DEST"
+if [ $? -eq 0 ]; then
+  echo "Snapshot file copied to $LOCAL_SNAPSHOT_DEST"
+else
+  echo "Error: Failed to copy snapshot file $SNAPSHOT_FILE from container"
+fi
+
+# Copy the profile of the snapshot stage, where all the cluster requests run
+if [ -n "$PROFILE" ]; then
+  SNAPSHOT_PROFILE_FILE="/app/es-cluster_snapshot_${CURRENT_DATE}.${PROFILE_SUFFIX}"
+  LOCAL_SNAPSHOT_PROFILE_DEST="./${ENVIRONMENT}_es-cluster_snapshot_${CURRENT_DATE}.${PROFILE_SUFFIX}"
+  podman cp "$CONTAINER_NAME:$SNAPSHOT_PROFILE_FILE" "$LOCAL_SNAPSHOT_PROFILE_DEST"
+  if [ $? -eq 0 ]; then
+    echo "Profile copied to $LOCAL_SNAPSHOT_PROFILE_DEST"
+  else
+    echo "Error: Failed to copy profile $SNAPSHOT_PROFILE_FILE from container"
+  fi
+fi
+
+# Report stages: run each script offline against the snapshot and copy output files
 for script_entry in "${SCRIPTS[@]}"; do
   PYTHON_SCRIPT_NAME="${script_entry%%:*}"
   SCRIPT_NAME="${script_entry##*:}"
@@ -66,6 +184,10 @@ for script_entry in "${SCRIPTS[@]}"; do
   CSV_FILE="/app/${SCRIPT_NAME}_${CURRENT_DATE}.csv"
   LOCAL_JSON_DEST="./${ENVIRONMENT}_${SCRIPT_NAME}_${CURRENT_DATE}.json"
   LOCAL_CSV_DEST="./${ENVIRONMENT}_${SCRIPT_NAME}_${CURRENT_DATE}.csv"
+  META_FILE="/app/${SCRIPT_NAME}_${CURRENT_DATE}.meta.json"
+  LOCAL_META_DEST="./${ENVIRONMENT}_${SCRIPT_NAME}_${CURRENT_DATE}.meta.json"
+  PROFILE_FILE="/app/${SCRIPT_NAME}_${CURRENT_DATE}.${PROFILE_SUFFIX}"
+  LOCAL_PROFILE_DEST="./${ENVIRONMENT}_${SCRIPT_NAME}_${CURRENT_DATE}.${PROFILE_SUFFIX}"
 
   # Check if the Python script exists in the container
   podman exec "$CONTAINER_NAME" test -f "/app/$PYTHON_SCRIPT_NAME"
@@ -75,10 +197,10 @@ for script_entry in "${SCRIPTS[@]}"; do
     exit 1
   fi
 
-  # Run the Python script with arguments
+  # Run the Python script against the snapshot
   echo "Running $PYTHON_SCRIPT_NAME in container..."
   podman exec -it "$CONTAINER_NAME" python "/app/$PYTHON_SCRIPT_NAME" \
-    --host "$HOST" --username "$USERNAME" --password "$PASSWORD"
+    --snapshot "$SNAPSHOT_FILE" "${PROFILE_ARGS[@]}"
   if [ $? -ne 0 ]; then
     echo "Error: Failed to run $PYTHON_SCRIPT_NAME"
     podman rm -f "$CONTAINER_NAME"
@@ -100,6 +222,27 @@ for script_entry in "${SCRIPTS[@]}"; do
   else
     echo "Error: Failed to copy CSV file $CSV_FILE from container"
   fi
+
+  # Copy the run timings file, for reports that write one next to their JSON array
+  podman exec "$CONTAINER_NAME" test -f "$META_FILE"
+  if [ $? -eq 0 ]; then
+    podman cp "$CONTAINER_NAME:$META_FILE" "$LOCAL_META_DEST"
+    if [ $? -eq 0 ]; then
+      echo "Timings file copied to $LOCAL_META_DEST"
+    else
+      echo "Error: Failed to copy timings file $META_FILE from container"
+    fi
+  fi
+
+  # Copy the profile, if profiling was enabled
+  if [ -n "$PROFILE" ]; then
+    podman cp "$CONTAINER_NAME:$PROFILE_FILE" "$LOCAL_PROFILE_DEST"
+    if [ $? -eq 0 ]; then
+      echo "Profile copied to $LOCAL_PROFILE_DEST"
+    else
+      echo "Error: Failed to copy profile $PROFILE_FILE from container"
+    fi
+  fi
 done
 
 # Remove the container
@@ -0,0 +1,142 @@
+import json
+import runpy
+import sys
+import time
+from collections import defaultdict
+
+# Stage timing for benchmark runs of the es-ilm scripts, without changing
+# the scripts themselves.
+#
+#   python -m es_ilm_bench TIMINGS.json SCRIPT.py [script arguments...]
+#
+# runs SCRIPT.py as __main__ after wrapping the calls every version of the
+# scripts goes through: elastic_transport's perform_request (classified by
+# path into connect, cat_indices, explain and policies), json.dump /
+# es_ilm_output.write_json (json_write) and DataFrame.to_csv /
+# CsvRowWriter (csv_write). Network stages are timed as spans, from the
+# first request start to the last request end, so concurrent requests are
+# not double-counted; write stages as the summed time inside the calls.
+# aggregation is the rest of the run, module imports included. The stage
+# times and the total are written to TIMINGS.json.
+
+STAGES = ["connect", "cat_indices", "explain", "policies", "aggregation", "json_write", "csv_write"]
+SPAN_STAGES = {"connect", "cat_indices", "explain", "policies"}
+
+class StageTimer:
+    def __init__(self):
+        self.spans = {}
+        self.sums = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    # Function to record one call of a stage
+    def record(self, stage, start, end):
+        first, last = self.spans.get(stage, (start, end))
+        self.spans[stage] = (min(first, start), max(last, end))
+        self.sums[stage] += end - start
+        self.calls[stage] += 1
+
+    # Function to get the time of every stage; aggregation is what is left of `total`
+    def stage_times(self, total):
+        times = {}
+        for stage in STAGES:
+            if stage in SPAN_STAGES:
+                first, last = self.spans.get(stage, (0.0, 0.0))
+                times[stage] = last - first
+            else:
+                times[stage] = self.sums.get(stage, 0.0)
+        times["aggregation"] = max(0.0, total - sum(t for stage, t in times.items() if stage != "aggregation"))
+        return times
+
+# Function to classify an Elasticsearch request path into a stage
+def request_stage(path):
+    path = path.split("?", 1)[0]
+    if path in ("", "/"):
+        return "connect"
+    if path.startswith("/_cat/indices"):
+        return "cat_indices"
+    if path.endswith("/_ilm/explain"):
+        return "explain"
+    if path.startswith("/_ilm/policy"):
+        return "policies"
+    return None
+
+# Function to wrap a function so its calls are recorded as `stage`
+def timed(timer, stage, function):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timer.record(stage, start, time.perf_counter())
+    return wrapper
+
+# Function to wrap the transport, JSON and CSV entry points
+def install(timer):
+    from elastic_transport import Transport
+
+    perform_request = Transport.perform_request
+
+    def transport_request(self, method, target, *args, **kwargs):
+        stage = request_stage(target)
+        if stage is None:
+            return perform_request(self, method, target, *args, **kwargs)
+        return timed(timer, stage, perform_request)(self, method, target, *args, **kwargs)
+    Transport.perform_request = transport_request
+
+    try:
+        from elastic_transport import AsyncTransport
+    except ImportError:
+        AsyncTransport = None
+    if AsyncTransport is not None:
+        async_perform_request = AsyncTransport.perform_request
+
+        async def async_transport_request(self, method, target, *args, **kwargs):
+            stage = request_stage(target)
+            start = time.perf_counter()
+            try:
+                return await async_perform_request(self, method, target, *args, **kwargs)
+            finally:
+                if stage is not None:
+                    timer.record(stage, start, time.perf_counter())
+        AsyncTransport.perform_request = async_transport_request
+
+    json.dump = timed(timer, "json_write", json.dump)
+    try:
+        import es_ilm_output
+    except ImportError:
+        es_ilm_output = None
+    if es_ilm_output is not None:
+        es_ilm_output.write_json = timed(timer, "json_write", es_ilm_output.write_json)
+        es_ilm_output.CsvRowWriter.__init__ = timed(timer, "csv_write", es_ilm_output.CsvRowWriter.__init__)
+        es_ilm_output.CsvRowWriter.write = timed(timer, "csv_write", es_ilm_output.CsvRowWriter.write)
+        es_ilm_output.CsvRowWriter.close = timed(timer, "csv_write", es_ilm_output.CsvRowWriter.close)
+    try:
+        import pandas
+    except ImportError:
+        pandas = None
+    if pandas is not None:
+        pandas.DataFrame.to_csv = timed(timer, "csv_write", pandas.DataFrame.to_csv)
+
+# Function to run a script under the stage timer and write its timings
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python -m es_ilm_bench TIMINGS.json SCRIPT.py [script arguments...]")
+        raise SystemExit(2)
+    timings_path, script = sys.argv[1], sys.argv[2]
+    timer = StageTimer()
+    install(timer)
+    sys.argv = [script] + sys.argv[3:]
+    exit_code = 0
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    total = time.perf_counter() - start
+    with open(timings_path, "w") as f:
+        json.dump({"total": total, "exit_code": exit_code, "stages": timer.stage_times(total),
+                   "calls": dict(timer.calls)}, f)
+    raise SystemExit(exit_code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+import asyncio
+import base64
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote
+
+from elasticsearch import Elasticsearch
+from es_ilm_log import get_logger
+from es_ilm_timing import span
+
+# AsyncElasticsearch imports fine without aiohttp and only fails when the
+# client is built, so check for aiohttp itself
+try:
+    import aiohttp  # noqa: F401  (the elasticsearch[async] extra)
+    from elasticsearch import AsyncElasticsearch
+except ImportError:
+    AsyncElasticsearch = None
+
+ASYNC_ENGINE_AVAILABLE = AsyncElasticsearch is not None
+ASYNC_ENGINE_MISSING = "the async engine requires the elasticsearch[async] extra (pip install 'elasticsearch[async]')"
+
+# Shared collection helpers for the es-ilm-query, es-ilm-query.sum,
+# es-index_info_collector and es-ilm_policy_analyzer scripts.
+#
+# Keep this file next to the scripts (and copy it into /app in the container)
+# so that `import es_ilm_collect` resolves from the script directory.
+
+# Elasticsearch rejects request lines longer than http.max_initial_line_length
+# (4kb by default), so keep each batched explain path comfortably below that.
+MAX_EXPLAIN_PATH_LENGTH = 3500
+
+log = get_logger()
+
+# cat.indices columns collected by es-cluster_snapshot; the union of what the
+# index info collector and the ILM policy analyzer read from each row
+SNAPSHOT_CAT_COLUMNS = "index,pri.store.size,pri,rep,docs.count,creation.date"
+
+# filter_path for each API call, so Elasticsearch only sends back the fields
+# the reports consume. ILM policy responses otherwise carry in_use_by,
+# version, modified_date and every action of every phase, which is megabytes
+# on clusters with many policies and data streams.
+INFO_FILTER_PATH = "version.number,cluster_name"
+EXPLAIN_FILTER_PATH = ("indices.*.index,indices.*.managed,indices.*.policy,indices.*.phase,"
+                       "indices.*.step,indices.*.step_time_millis,indices.*.lifecycle_date_millis")
+POLICY_FILTER_PATH = "*.policy.phases.*.min_age,*.policy.phases.*.actions.rollover"
+
+# With policy_scope="referenced", only the policies named in the explain
+# results are fetched; above this many names the full catalog is cheaper
+MAX_REFERENCED_POLICIES = 100
+
+# Function to create a client that ignores certificate verification, with a
+# connection pool large enough for `concurrency` requests in flight. With
+# request_stats (es_ilm_timing.RequestStats), every request it sends is counted.
+def connect(host, username, password, concurrency=1, request_stats=None):
+    return Elasticsearch(
+        [host],
+        basic_auth=(username, password),
+        verify_certs=False,
+        ssl_show_warn=False,
+        connections_per_node=max(concurrency, 10),
+        **(request_stats.client_classes() if request_stats is not None else {})
+    )
+
+# Function to parse a human-readable cat size (e.g. "12.3gb") to bytes
+def parse_cat_size(size_str, index_name, warn=True):
+    size_str = (size_str or "0b").lower().strip()
+    numeric_part = ''.join(c for c in size_str if c.isdigit() or c == '.')
+    unit = size_str[len(numeric_part):] if numeric_part else 'b'
+    try:
+        value = float(numeric_part) if numeric_part else 0.0
+    except ValueError:
+        if warn:
+            log.warning(f"Could not parse size '{size_str}' for index '{index_name}', assuming 0 bytes",
+                        extra={"warning_type": "unparseable_size"})
+        value = 0.0
+    multipliers = {'b': 1, 'kb': 1024, 'mb': 1024**2, 'gb': 1024**3, 'tb': 1024**4, 'pb': 1024**5}
+    return value * multipliers.get(unit, 1)
+
+# Function to build the optional unit parameters for cat.indices
+def cat_params(cat_bytes=None):
+    return {"bytes": cat_bytes} if cat_bytes else {}
+
+# Function to build the Basic Auth header used for transport-level requests
+def get_auth_header(username, password):
+    auth_string = f"{username}:{password}"
+    auth_encoded = base64.b64encode(auth_string.encode()).decode()
+    return {"Authorization": f"Basic {auth_encoded}"}
+
+# Function to normalize a transport response into a plain dict body
+def response_body(response):
+    if isinstance(response, tuple):
+        response = response[-1] if response else {}  # Take last element (likely body)
+    if hasattr(response, "body"):
+        response = response.body
+    if not isinstance(response, dict):
+        return {}
+    return response
+
+# Function to split index names into comma-joined chunks that fit in one URL
+def chunk_index_names(index_names, max_path_length=MAX_EXPLAIN_PATH_LENGTH):
+    chunks = []
+    current = []
+    current_length = 0
+    for name in index_names:
+        encoded = quote(name, safe="")
+        # +1 for the joining comma
+        if current and current_length + len(encoded) + 1 > max_path_length:
+            chunks.append(current)
+            current = []
+            current_length = 0
+        current.append(encoded)
+        current_length += len(encoded) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+# Function to build the explain request path for an already URL-encoded,
+# comma-joined list of index names
+def explain_path(encoded_names):
+    return f"/{encoded_names}/_ilm/explain?filter_path={EXPLAIN_FILTER_PATH}"
+
+# Function to get ILM explain data for a single index
+def explain_index(es, index_name, auth_header=None):
+    try:
+        ilm_info = es.transport.perform_request("GET", explain_path(quote(index_name, safe='')), headers=auth_header)
+        return response_body(ilm_info).get("indices", {}).get(index_name, {})
+    except Exception as e:
+        log.warning(f"Failed to get ILM info for index '{index_name}': {str(e)}", extra={"warning_type": "explain_failed"})
+        return {}
+
+# Function to get ILM explain data for many indices in a handful of requests.
+# Index names are sent as comma-joined chunks; if a chunk fails (for example an
+# index was deleted between cat.indices and explain, which fails the whole
+# request), the indices of that chunk are explained one by one instead.
+# Returns a dict of index name -> explain entry.
+def explain_indices(es, index_names, auth_header=None, max_path_length=MAX_EXPLAIN_PATH_LENGTH):
+    explained = {}
+    chunks = chunk_index_names(index_names, max_path_length)
+    for chunk_num, chunk in enumerate(chunks, start=1):
+        try:
+            ilm_info = es.transport.perform_request("GET", explain_path(','.join(chunk)), headers=auth_header)
+            explained.update(response_body(ilm_info).get("indices", {}))
+        except Exception as e:
+            log.warning(f"Batched ILM explain failed for chunk {chunk_num}/{len(chunks)} ({len(chunk)} indices): {str(e)}; "
+                        "falling back to per-index ILM explain for this chunk", extra={"warning_type": "explain_chunk_failed"})
+            for encoded in chunk:
+                index_name = unquote(encoded)
+                explained[index_name] = explain_index(es, index_name, auth_header)
+    return explained
+
+# Function to get ILM explain data with one request per index, keeping up to
+# `concurrency` requests in flight. Used when security roles only grant
+# per-index privileges and batched explain is rejected. The client is shared
+# by all workers, so create it with connections_per_node >= concurrency.
+# Returns a dict of index name -> explain entry.
+def explain_indices_concurrent(es, index_names, auth_header=None, concurrency=1):
+    if concurrency <= 1:
+        return {name: explain_index(es, name, auth_header) for name in index_names}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        entries = executor.map(lambda name: explain_index(es, name, auth_header), index_names)
+        return dict(zip(index_names, entries))
+
+# Function to get the names of the ILM policies that managed indices use
+def referenced_policy_names(explain):
+    return sorted({entry["policy"] for entry in explain.values() if entry.get("managed") and entry.get("policy")})
+
+# Function to decide which policies to request: a comma-joined list of names,
+# or None for the full catalog
+def policy_request_names(policy_names):
+    if policy_names is None or len(policy_names) > MAX_REFERENCED_POLICIES:
+        return None
+    joined = ",".join(policy_names)
+    if len(quote(joined, safe=",")) > MAX_EXPLAIN_PATH_LENGTH:
+        return None
+    return joined
+
+# Function to get ILM policies: only `policy_names` (GET _ilm/policy/a,b,c)
+# when given and small enough, otherwise the full catalog. A referenced fetch
+# fails as a whole if one policy is missing, so it falls back to the full
+# catalog, where the missing policy is simply absent.
+# Returns (policies, error).
+def get_policies(es, policy_names=None):
+    names = policy_request_names(policy_names)
+    if names == "":
+        return {}, None
+    if names is not None:
+        try:
+            return response_body(es.ilm.get_lifecycle(name=names, filter_path=POLICY_FILTER_PATH)), None
+        except Exception as e:
+            log.warning(f"Failed to get referenced ILM policies, fetching all policies instead: {str(e)}")
+    try:
+        return response_body(es.ilm.get_lifecycle(filter_path=POLICY_FILTER_PATH)), None
+    except Exception as e:
+        return {}, str(e)
+
+# Function to get the names of the cat rows to explain: those passing
+# `explain_filter` that the explain cache (if any) does not cover
+def explain_index_names(indices, explain_filter=None, explain_cache=None):
+    return [idx["index"] for idx in indices
+            if (explain_filter is None or explain_filter(idx))
+            and (explain_cache is None or explain_cache.needs_explain(idx))]
+
+# Function to create the dict returned by the collect functions and snapshots
+def empty_cluster():
+    return {"info": {}, "indices": [], "explain": {}, "policies": {}, "policies_error": None}
+
+# Function to collect everything the reports need from the cluster with the
+# synchronous client: cluster info, cat.indices rows, ILM explain entries and
+# (optionally) ILM policies. `explain_filter` restricts which cat rows are
+# explained. Pass cat_bytes="b" to get pri.store.size and friends as raw byte
+# counts instead of rounded human-readable strings, and policy_scope=
+# "referenced" to fetch only the policies the explained indices use. With an
+# explain_cache (es_ilm_incremental.ExplainCache), rows it does not need
+# fresh are skipped and their cached explain entries used instead. With
+# timings (es_ilm_timing.RunTimings), each API call is timed as a stage.
+# Errors are printed and turned into empty results, the same way the scripts
+# have always handled them.
+def collect_cluster(es, cat_columns, auth_header=None, explain_mode="batch", concurrency=1,
+                    explain_filter=None, fetch_policies=True, cat_bytes=None, policy_scope="all", explain_cache=None,
+                    timings=None):
+    cluster = empty_cluster()
+    try:
+        with span(timings, "connect"):
+            es_info = es.info(filter_path=INFO_FILTER_PATH)
+        log.info("Successfully connected to Elasticsearch cluster")
+        log.info(f"Elasticsearch version: {es_info['version']['number']}")
+        cluster["info"] = response_body(es_info)
+    except Exception as e:
+        log.error(f"Connecting to Elasticsearch failed: {str(e)}")
+        return cluster
+
+    try:
+        with span(timings, "cat_indices"):
+            cluster["indices"] = list(es.cat.indices(format="json", h=cat_columns, **cat_params(cat_bytes)))
+    except Exception as e:
+        log.error(f"Fetching indices failed: {str(e)}")
+
+    with span(timings, "explain"):
+        index_names = explain_index_names(cluster["indices"], explain_filter, explain_cache)
+        if explain_mode == "batch":
+            cluster["explain"] = explain_indices(es, index_names, auth_header)
+        else:
+            log.info(f"Fetching ILM explain data per index with concurrency {concurrency}")
+            cluster["explain"] = explain_indices_concurrent(es, index_names, auth_header, concurrency)
+        if explain_cache is not None:
+            explain_cache.merge(cluster["explain"])
+
+    if fetch_policies:
+        with span(timings, "policies"):
+            policy_names = referenced_policy_names(cluster["explain"]) if policy_scope == "referenced" else None
+            cluster["policies"], cluster["policies_error"] = get_policies(es, policy_names)
+    return cluster
+
+# Async counterpart of explain_index
+async def explain_index_async(es, index_name, auth_header=None):
+    try:
+        ilm_info = await es.transport.perform_request("GET", explain_path(quote(index_name, safe='')), headers=auth_header)
+        return response_body(ilm_info).get("indices", {}).get(index_name, {})
+    except Exception as e:
+        log.warning(f"Failed to get ILM info for index '{index_name}': {str(e)}", extra={"warning_type": "explain_failed"})
+        return {}
+
+# Async counterpart of explain_indices: every chunk (or, in per-index mode,
+# every index) is its own task, with at most `concurrency` requests in flight.
+async def explain_indices_async(es, index_names, auth_header=None, explain_mode="batch", concurrency=8):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def explain_one(index_name):
+        async with semaphore:
+            return index_name, await explain_index_async(es, index_name, auth_header)
+
+    async def explain_chunk(chunk_num, chunk, total):
+        async with semaphore:
+            try:
+                ilm_info = await es.transport.perform_request("GET", explain_path(','.join(chunk)), headers=auth_header)
+                return response_body(ilm_info).get("indices", {})
+            except Exception as e:
+                log.warning(f"Batched ILM explain failed for chunk {chunk_num}/{total} ({len(chunk)} indices): {str(e)}; "
+                            "falling back to per-index ILM explain for this chunk", extra={"warning_type": "explain_chunk_failed"})
+        entries = await asyncio.gather(*(explain_one(unquote(encoded)) for encoded in chunk))
+        return dict(entries)
+
+    explained = {}
+    if explain_mode == "batch":
+        chunks = chunk_index_names(index_names)
+        for result in await asyncio.gather(*(explain_chunk(n, chunk, len(chunks)) for n, chunk in enumerate(chunks, start=1))):
+            explained.update(result)
+    else:
+        log.info(f"Fetching ILM explain data per index with concurrency {concurrency}")
+        explained.update(await asyncio.gather(*(explain_one(name) for name in index_names)))
+    return explained
+
+# Async counterpart of get_policies
+async def get_policies_async(es, policy_names=None):
+    names = policy_request_names(policy_names)
+    if names == "":
+        return {}, None
+    if names is not None:
+        try:
+            return response_body(await es.ilm.get_lifecycle(name=names, filter_path=POLICY_FILTER_PATH)), None
+        except Exception as e:
+            log.warning(f"Failed to get referenced ILM policies, fetching all policies instead: {str(e)}")
+    try:
+        return response_body(await es.ilm.get_lifecycle(filter_path=POLICY_FILTER_PATH)), None
+    except Exception as e:
+        return {}, str(e)
+
+# Asyncio counterpart of collect_cluster built on AsyncElasticsearch.
+# cat.indices and get_lifecycle are independent, so they run concurrently;
+# explain requests start as soon as the index list is known and fan out
+# under a semaphore of `concurrency` in-flight requests. With policy_scope=
+# "referenced" the policies depend on the explain results, so they are
+# fetched right after them instead.
+async def collect_cluster_async(host, username, password, cat_columns, explain_mode="batch", concurrency=8,
+                                explain_filter=None, fetch_policies=True, cat_bytes=None, policy_scope="all",
+                                explain_cache=None, timings=None):
+    if not ASYNC_ENGINE_AVAILABLE:
+        raise RuntimeError(ASYNC_ENGINE_MISSING)
+
+    cluster = empty_cluster()
+    auth_header = get_auth_header(username, password)
+    es = AsyncElasticsearch(
+        [host],
+        basic_auth=(username, password),
+        verify_certs=False,
+        ssl_show_warn=False,
+        connections_per_node=max(concurrency, 10),
+        **(timings.request_stats.client_classes(use_async=True) if timings is not None else {})
+    )
+    try:
+        try:
+            with span(timings, "connect"):
+                es_info = await es.info(filter_path=INFO_FILTER_PATH)
+            log.info("Successfully connected to Elasticsearch cluster")
+            log.info(f"Elasticsearch version: {es_info['version']['number']}")
+            cluster["info"] = response_body(es_info)
+        except Exception as e:
+            log.error(f"Connecting to Elasticsearch failed: {str(e)}")
+            return cluster
+
+        async def fetch_indices_and_explain():
+            try:
+                with span(timings, "cat_indices"):
+                    cluster["indices"] = list(await es.cat.indices(format="json", h=cat_columns, **cat_params(cat_bytes)))
+            except Exception as e:
+                log.error(f"Fetching indices failed: {str(e)}")
+            with span(timings, "explain"):
+                index_names = explain_index_names(cluster["indices"], explain_filter, explain_cache)
+                cluster["explain"] = await explain_indices_async(es, index_names, auth_header, explain_mode, concurrency)
+                if explain_cache is not None:
+                    explain_cache.merge(cluster["explain"])
+            if fetch_policies and policy_scope == "referenced":
+                await fetch_policies_for(referenced_policy_names(cluster["explain"]))
+
+        async def fetch_policies_for(policy_names):
+            with span(timings, "policies"):
+                cluster["policies"], cluster["policies_error"] = await get_policies_async(es, policy_names)
+
+        tasks = [fetch_indices_and_explain()]
+        if fetch_policies and policy_scope != "referenced":
+            tasks.append(fetch_policies_for(None))
+        await asyncio.gather(*tasks)
+    finally:
+        await es.close()
+    return cluster
+
+# Function to write a collected cluster dict to a raw snapshot file, so that
+# several reports can be produced from one collection run. Files ending in
+# .gz are gzip-compressed.
+def save_snapshot(cluster, path, cat_columns, cat_bytes=None, collected_at=None):
+    snapshot = dict(cluster)
+    snapshot["_snapshot"] = {
+        "cat_columns": cat_columns,
+        "cat_bytes": cat_bytes,
+        "collected_at": collected_at,
+    }
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt") as f:
+        json.dump(snapshot, f)
+
+# Function to read a snapshot written by save_snapshot. Raises ValueError if
+# the snapshot lacks any of the cat columns the report needs, or was not
+# collected with the byte unit the report expects. The collection time is
+# returned as "collected_at" (None for snapshots that did not record it).
+def load_snapshot(path, required_columns, cat_bytes=None):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        snapshot = json.load(f)
+    meta = snapshot.pop("_snapshot", {})
+    available = set((meta.get("cat_columns") or "").split(","))
+    missing = [c for c in required_columns.split(",") if c not in available]
+    if missing:
+        raise ValueError(f"snapshot is missing cat.indices columns: {', '.join(missing)}")
+    if meta.get("cat_bytes") != cat_bytes:
+        raise ValueError(f"snapshot was collected with bytes={meta.get('cat_bytes')}, expected bytes={cat_bytes}")
+    snapshot["collected_at"] = meta.get("collected_at")
+    return snapshot
@@ -0,0 +1,257 @@
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Local stand-in for the Elasticsearch APIs the es-ilm scripts call, for
+# tests and benchmarks without a cluster:
+#   GET /                                  cluster info
+#   GET /_cat/indices?format=json&h=...    with bytes=b or human-readable sizes
+#   GET /<index>[,<index>...]/_ilm/explain 404 if any index is unknown
+#   GET /_ilm/policy[/<name>[,<name>...]]  404 if any policy is unknown
+# filter_path is applied to every response, like Elasticsearch does, so
+# response sizes are realistic. Every request waits `latency` seconds first
+# to simulate the network and the cluster. Data comes from a synthetic
+# generator (N indices, M policies) or is replayed from a snapshot written
+# by es-cluster_snapshot.
+
+PHASES = ["hot", "warm", "cold", "frozen", "delete"]
+HUMAN_UNITS = [("pb", 1024**5), ("tb", 1024**4), ("gb", 1024**3), ("mb", 1024**2), ("kb", 1024)]
+
+# Function to format bytes the way cat APIs do without bytes= (e.g. "4.5gb")
+def human_size(size_bytes):
+    for unit, divisor in HUMAN_UNITS:
+        if size_bytes >= divisor:
+            return f"{size_bytes / divisor:.1f}".rstrip("0").rstrip(".") + unit
+    return f"{size_bytes}b"
+
+# Function to apply an Elasticsearch filter_path (comma-separated dotted
+# patterns with * wildcards) to a response body
+def apply_filter_path(body, filter_path):
+    patterns = [pattern.split(".") for pattern in filter_path.split(",") if pattern]
+    filtered = filter_value(body, patterns)
+    if filtered is None:
+        return [] if isinstance(body, list) else {}
+    return filtered
+
+# Function to filter one value by the remaining pattern segments
+def filter_value(value, patterns):
+    if any(not pattern for pattern in patterns):
+        return value
+    if isinstance(value, list):
+        items = [filter_value(item, patterns) for item in value]
+        items = [item for item in items if item is not None]
+        return items or None
+    if not isinstance(value, dict):
+        return None
+    filtered = {}
+    for key, child in value.items():
+        remaining = [pattern[1:] for pattern in patterns if fnmatchcase(key, pattern[0])]
+        if remaining:
+            child = filter_value(child, remaining)
+            if child is not None:
+                filtered[key] = child
+    return filtered or None
+
+class FakeCluster:
+    # `indices` maps index name -> cat column values (sizes as byte counts),
+    # `explain` index name -> explain entry, `policies` name -> policy
+    def __init__(self, indices, explain, policies, latency=0.0, version="8.14.0", cluster_name="fake-cluster"):
+        self.indices = indices
+        self.explain = explain
+        self.policies = policies
+        self.latency = latency
+        self.info = {
+            "name": "fake-node",
+            "cluster_name": cluster_name,
+            "version": {"number": version, "build_flavor": "default"},
+            "tagline": "You Know, for Search",
+        }
+        self.requests = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    # Function to build a synthetic cluster: `num_indices` data stream backing
+    # indices spread over `num_policies` policies and two years of creation
+    # dates, about 2% of them not managed by ILM
+    @classmethod
+    def synthetic(cls, num_indices, num_policies=10, latency=0.0, seed=1):
+        rng = random.Random(seed)
+        policies = {}
+        for p in range(num_policies):
+            policies[f"policy-{p:03d}"] = {
+                "version": 1,
+                "modified_date": "2024-01-01T00:00:00.000Z",
+                "policy": {"phases": {
+                    "hot": {"min_age": "0ms", "actions": {"rollover": {"max_age": "1d", "max_primary_shard_size": "50gb"},
+                                                          "set_priority": {"priority": 100}}},
+                    "warm": {"min_age": f"{rng.choice([2, 7, 14])}d", "actions": {"forcemerge": {"max_num_segments": 1},
+                                                                                  "set_priority": {"priority": 50}}},
+                    "cold": {"min_age": "30d", "actions": {"set_priority": {"priority": 0}}},
+                    "delete": {"min_age": f"{rng.choice([90, 365, 730])}d", "actions": {"delete": {"delete_searchable_snapshot": True}}},
+                }},
+                "in_use_by": {"indices": [], "data_streams": [f"logs-app{p:03d}-default"], "composable_templates": []},
+            }
+        policy_names = sorted(policies)
+
+        now = 1735689600000  # 2025-01-01T00:00:00Z
+        indices = {}
+        explain = {}
+        for i in range(num_indices):
+            created = now - rng.randrange(730 * 86400) * 1000
+            stream = f"logs-app{i % max(num_policies, 1):03d}-default"
+            name = f".ds-{stream}-{datetime.fromtimestamp(created / 1000, tz=timezone.utc):%Y.%m.%d}-{i:06d}"
+            size = rng.randrange(0, 60 * 1024**3)
+            pri = rng.choice([1, 1, 2, 3])
+            indices[name] = {
+                "uuid": f"{rng.getrandbits(64):016x}{i:06d}",
+                "pri": pri,
+                "rep": 1,
+                "pri.store.size": size,
+                "store.size": size * 2,
+                "docs.count": size // 700,
+                "creation.date": created,
+            }
+            if i % 50 == 49 or not policy_names:
+                explain[name] = {"index": name, "managed": False}
+                continue
+            phase = rng.choices(PHASES[:4], weights=[5, 35, 50, 10])[0]
+            explain[name] = {
+                "index": name,
+                "managed": True,
+                "policy": policy_names[i % len(policy_names)],
+                "index_creation_date_millis": created,
+                "time_since_index_creation": f"{(now - created) // 86400000}d",
+                "lifecycle_date_millis": created,
+                "age": f"{(now - created) // 86400000}d",
+                "phase": phase,
+                "phase_time_millis": created,
+                "action": "complete",
+                "action_time_millis": created,
+                "step": "complete",
+                "step_time_millis": created,
+                "phase_execution": {"policy": policy_names[i % len(policy_names)], "version": 1,
+                                    "modified_date_in_millis": 1704067200000},
+            }
+        return cls(indices, explain, policies, latency)
+
+    # Function to replay a snapshot written by es-cluster_snapshot (plain or
+    # .gz). Sizes must have been collected with bytes=b.
+    @classmethod
+    def from_snapshot(cls, path, latency=0.0):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            snapshot = json.load(f)
+        if snapshot.get("_snapshot", {}).get("cat_bytes") != "b":
+            raise ValueError("the fake cluster needs a snapshot collected with bytes=b")
+        indices = {}
+        for row in snapshot["indices"]:
+            values = dict(row)
+            name = values.pop("index")
+            for column in ("pri.store.size", "store.size", "docs.count", "creation.date", "pri", "rep"):
+                if values.get(column) not in (None, ""):
+                    values[column] = int(values[column])
+            indices[name] = values
+        info = snapshot.get("info", {})
+        return cls(indices, snapshot.get("explain", {}), snapshot.get("policies", {}), latency,
+                   info.get("version", {}).get("number", "8.14.0"), info.get("cluster_name", "fake-cluster"))
+
+    # Function to render one cat.indices row with the requested columns
+    def cat_row(self, name, values, columns, raw_bytes):
+        row = {}
+        for column in columns:
+            if column == "index":
+                row[column] = name
+            elif column == "creation.date.string":
+                created = values.get("creation.date")
+                row[column] = (datetime.fromtimestamp(created / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+                               if created else None)
+            elif column in ("pri.store.size", "store.size"):
+                size = values.get(column)
+                row[column] = None if size is None else (str(size) if raw_bytes else human_size(size))
+            elif column in values:
+                row[column] = str(values[column])
+            else:
+                row[column] = None
+        return row
+
+    # Function to answer one GET request; returns (status, body)
+    def handle(self, path, query):
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        if not parts:
+            return 200, self.info
+        if parts == ["_cat", "indices"]:
+            columns = query.get("h", "index,health,status,pri,rep,docs.count,store.size,pri.store.size").split(",")
+            raw_bytes = query.get("bytes") == "b"
+            return 200, [self.cat_row(name, values, columns, raw_bytes) for name, values in self.indices.items()]
+        if len(parts) == 3 and parts[1:] == ["_ilm", "explain"]:
+            names = parts[0].split(",")
+            missing = [name for name in names if name not in self.explain]
+            if missing:
+                return 404, {"error": {"type": "index_not_found_exception", "reason": f"no such index [{missing[0]}]"},
+                             "status": 404}
+            return 200, {"indices": {name: self.explain[name] for name in names}}
+        if parts[:2] == ["_ilm", "policy"]:
+            if len(parts) == 2:
+                return 200, self.policies
+            names = parts[2].split(",")
+            missing = [name for name in names if name not in self.policies]
+            if missing:
+                return 404, {"error": {"type": "resource_not_found_exception",
+                                       "reason": f"Lifecycle policy not found: [{missing[0]}]"}, "status": 404}
+            return 200, {name: self.policies[name] for name in names}
+        return 404, {"error": {"type": "fake_cluster_exception", "reason": f"unsupported path [{path}]"}, "status": 404}
+
+# Request handler serving a FakeCluster (set as the server's `cluster`)
+class FakeClusterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment without Nagle delays, otherwise
+    # every keep-alive request waits ~40ms for a delayed ACK
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+        cluster = self.server.cluster
+        with cluster.lock:
+            cluster.requests += 1
+            cluster.bytes_sent += len(payload)
+
+    def do_GET(self):
+        cluster = self.server.cluster
+        if cluster.latency:
+            time.sleep(cluster.latency)
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, body = cluster.handle(url.path, query)
+        if status == 200 and query.get("filter_path"):
+            body = apply_filter_path(body, query["filter_path"])
+        self.send_body(status, body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+# Function to start serving `cluster` on a background thread; port 0 picks a
+# free port. Returns the server (server.url, server.shutdown()).
+def start_fake_server(cluster, host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), FakeClusterHandler)
+    server.daemon_threads = True
+    server.cluster = cluster
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,175 @@
+import gzip
+import json
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:  # .zst report files are optional
+    zstandard = None
+
+# SQLite history of past report runs.
+#
+# Each imported report file becomes one snapshot date. Analyzer reports
+# (es-ilm_policy_analyzer_<date>.json) fill the policy_phases table with the
+# per-policy, per-phase totals; collector reports (es-index_info_collector_
+# <date>.json or .ndjson) fill the indices table with per-index sizes.
+# Re-importing a date replaces its rows. The primary keys double as the
+# indexes the history queries use: (policy, phase, snapshot_date) and
+# (index_name, snapshot_date), so growth queries read a few index pages
+# instead of re-parsing every report file.
+
+DEFAULT_HISTORY_DB = "es-ilm_history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    snapshot_date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    imported_at TEXT NOT NULL,
+    PRIMARY KEY (snapshot_date, kind)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS policy_phases (
+    policy TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    snapshot_date TEXT NOT NULL,
+    num_indices INTEGER NOT NULL,
+    total_shards INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    PRIMARY KEY (policy, phase, snapshot_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS policy_phases_by_date ON policy_phases (snapshot_date);
+CREATE TABLE IF NOT EXISTS indices (
+    index_name TEXT NOT NULL,
+    snapshot_date TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    doc_count INTEGER NOT NULL,
+    creation_date TEXT,
+    PRIMARY KEY (index_name, snapshot_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS indices_by_policy ON indices (policy, phase, snapshot_date);
+"""
+
+DATE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+# Function to open (and create if needed) the history database
+def open_history(path=DEFAULT_HISTORY_DB):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+# Function to get the snapshot date from a report file name
+# (e.g. es-ilm_policy_analyzer_2025-03-01.json -> 2025-03-01)
+def snapshot_date_from_path(path):
+    match = DATE_PATTERN.search(path.rsplit("/", 1)[-1])
+    return match.group(1) if match else None
+
+# Function to read a report file, plain, gzip (.gz) or zstd (.zst)
+def read_report_text(path):
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt") as f:
+            return f.read()
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError("reading .zst files requires zstandard (pip install zstandard)")
+        with open(path, "rb") as f:
+            return zstandard.ZstdDecompressor().stream_reader(f).read().decode()
+    with open(path) as f:
+        return f.read()
+
+# Function to parse a report file: an analyzer report (JSON object keyed by
+# policy, plus the run's _meta), or a collector report (JSON array, or NDJSON
+# with one record per line). Returns ("analyzer" | "collector", data).
+def parse_report(text):
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return "collector", json.loads(stripped)
+    try:
+        data = json.loads(stripped)
+    except json.JSONDecodeError:
+        return "collector", [json.loads(line) for line in stripped.splitlines() if line.strip()]
+    if isinstance(data, dict) and "index" in data:
+        return "collector", [data]
+    if isinstance(data, dict) and set(data) == {"_meta"}:
+        raise ValueError("this is a run metadata file (.meta.json), not a report")
+    return "analyzer", {policy: result for policy, result in data.items() if policy != "_meta"}
+
+# Function to import one report file as `snapshot_date`, replacing any rows
+# previously imported for that date. Returns (kind, number of rows).
+def import_report(db, path, snapshot_date):
+    kind, data = parse_report(read_report_text(path))
+    with db:
+        if kind == "analyzer":
+            db.execute("DELETE FROM policy_phases WHERE snapshot_date = ?", (snapshot_date,))
+            rows = [
+                (policy, phase, snapshot_date, p["num_indices"], p["total_shards"], p["total_size_bytes"])
+                for policy, result in data.items()
+                for phase, p in result.get("phases", {}).items()
+            ]
+            db.executemany("INSERT INTO policy_phases VALUES (?, ?, ?, ?, ?, ?)", rows)
+        else:
+            db.execute("DELETE FROM indices WHERE snapshot_date = ?", (snapshot_date,))
+            rows = [
+                (r["index"], snapshot_date, r["policy"], r["phase"], r["size_bytes"], r.get("doc_count", 0),
+                 r.get("creation_date"))
+                for r in data
+            ]
+            db.executemany("INSERT INTO indices VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                   (snapshot_date, kind, path, datetime.now(timezone.utc).isoformat()))
+    return kind, len(rows)
+
+# Function to get a policy's totals per snapshot date, optionally for one
+# phase only, as (snapshot_date, num_indices, total_shards, size_bytes) rows
+def policy_growth(db, policy, phase=None, since=None, until=None):
+    query = ("SELECT snapshot_date, SUM(num_indices), SUM(total_shards), SUM(size_bytes) FROM policy_phases "
+             "WHERE policy = ?")
+    params = [policy]
+    if phase:
+        query += " AND phase = ?"
+        params.append(phase)
+    if since:
+        query += " AND snapshot_date >= ?"
+        params.append(since)
+    if until:
+        query += " AND snapshot_date <= ?"
+        params.append(until)
+    query += " GROUP BY snapshot_date ORDER BY snapshot_date"
+    return db.execute(query, params).fetchall()
+
+# Function to get an index's size per snapshot date, as
+# (snapshot_date, policy, phase, size_bytes, doc_count) rows
+def index_growth(db, index_name, since=None, until=None):
+    query = "SELECT snapshot_date, policy, phase, size_bytes, doc_count FROM indices WHERE index_name = ?"
+    params = [index_name]
+    if since:
+        query += " AND snapshot_date >= ?"
+        params.append(since)
+    if until:
+        query += " AND snapshot_date <= ?"
+        params.append(until)
+    query += " ORDER BY snapshot_date"
+    return db.execute(query, params).fetchall()
+
+# Function to get the first and last analyzer snapshot dates in a range
+def snapshot_range(db, since=None, until=None):
+    return db.execute(
+        "SELECT MIN(snapshot_date), MAX(snapshot_date) FROM policy_phases "
+        "WHERE snapshot_date >= ? AND snapshot_date <= ?",
+        (since or "0000-00-00", until or "9999-99-99"),
+    ).fetchone()
+
+# Function to rank policies by size growth between two snapshot dates, as
+# (policy, start_bytes, end_bytes) rows, largest growth first
+def top_growing_policies(db, start, end, limit=10):
+    return db.execute(
+        "SELECT policy, "
+        "COALESCE(SUM(CASE WHEN snapshot_date = :start THEN size_bytes END), 0) AS start_bytes, "
+        "COALESCE(SUM(CASE WHEN snapshot_date = :end THEN size_bytes END), 0) AS end_bytes "
+        "FROM policy_phases WHERE snapshot_date IN (:start, :end) GROUP BY policy "
+        "ORDER BY end_bytes - start_bytes DESC LIMIT :limit",
+        {"start": start, "end": end, "limit": limit},
+    ).fetchall()
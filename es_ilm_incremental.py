@@ -0,0 +1,126 @@
+import gzip
+import json
+import re
+import time
+import zlib
+from es_ilm_log import get_logger
+
+# Incremental ILM explain for daily collection runs.
+#
+# The state file keeps, per index UUID, the index name, its cat.indices
+# pri.store.size and the explain entry of the last run (phase, step,
+# step_time_millis, lifecycle_date_millis), plus the ILM policies. On the
+# next run an index is only explained again when:
+#   - its UUID is new, or its name or size changed;
+#   - ILM is still working on it (step is not "complete", e.g. a write index
+#     waiting for rollover, or an index in the ERROR step);
+#   - its next phase is due: lifecycle_date_millis plus the next phase's
+#     min_age has passed;
+#   - it is in today's refresh slice: every cached entry is re-explained
+#     once every `refresh_days` days (by UUID hash), to pick up changes that
+#     do not show in the size, such as a policy being attached or removed.
+# Every other index reuses its cached entry, which on a stable cluster is
+# the vast majority.
+
+log = get_logger()
+
+DEFAULT_REFRESH_DAYS = 30
+STATE_VERSION = 1
+
+# ILM phases in execution order
+PHASE_ORDER = ["hot", "warm", "cold", "frozen", "delete"]
+
+TIME_UNIT_MILLIS = {"nanos": 1e-6, "micros": 1e-3, "ms": 1, "s": 1000, "m": 60000, "h": 3600000, "d": 86400000}
+TIME_VALUE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)(nanos|micros|ms|s|m|h|d)$")
+
+# Function to parse an Elasticsearch time value (e.g. "30d", "12h") to
+# milliseconds; None if it cannot be parsed
+def parse_time_value(value):
+    match = TIME_VALUE_PATTERN.match(str(value).strip())
+    if not match:
+        return None
+    return int(float(match.group(1)) * TIME_UNIT_MILLIS[match.group(2)])
+
+# Function to create an empty state
+def empty_state():
+    return {"version": STATE_VERSION, "saved_at": None, "indices": {}, "policies": {}}
+
+# Function to read a state file (.gz to compress); a missing file is an
+# empty state, so the first run explains everything
+def load_state(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    try:
+        with opener(path, "rt") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        log.info(f"No incremental state at {path}, explaining all indices")
+        return empty_state()
+    if state.get("version") != STATE_VERSION:
+        log.warning(f"Ignoring incremental state {path} with unsupported version {state.get('version')}")
+        return empty_state()
+    return state
+
+# Function to write a state file (.gz to compress)
+def save_state(state, path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt") as f:
+        json.dump(state, f)
+
+class ExplainCache:
+    # Decides per cat.indices row whether it needs a fresh explain, and
+    # hands out the cached entries of the rows that do not. Pass it as
+    # explain_cache to es_ilm_collect.collect_cluster / collect_cluster_async;
+    # the cat columns must include uuid.
+    def __init__(self, state, refresh_days=DEFAULT_REFRESH_DAYS, now_millis=None):
+        self.indices = state.get("indices", {})
+        self.policies = state.get("policies", {})
+        self.refresh_days = refresh_days
+        self.now_millis = now_millis if now_millis is not None else int(time.time() * 1000)
+        self.refresh_slot = (self.now_millis // 86400000) % refresh_days
+        self.reused = {}
+
+    # Function to tell whether the next phase of a cached entry is due
+    def transition_due(self, entry):
+        phases = self.policies.get(entry.get("policy"), {}).get("policy", {}).get("phases")
+        lifecycle_date = entry.get("lifecycle_date_millis")
+        phase = entry.get("phase")
+        if not phases or lifecycle_date is None or phase not in PHASE_ORDER:
+            return True
+        for next_phase in PHASE_ORDER[PHASE_ORDER.index(phase) + 1:]:
+            if next_phase in phases:
+                min_age = parse_time_value(phases[next_phase].get("min_age", "0ms"))
+                return min_age is None or lifecycle_date + min_age <= self.now_millis
+        return False
+
+    # Function to decide whether a cat.indices row needs a fresh explain
+    def needs_explain(self, idx):
+        uuid = idx.get("uuid")
+        cached = self.indices.get(uuid) if uuid else None
+        if cached is None or cached["index"] != idx["index"] or cached["size"] != idx.get("pri.store.size"):
+            return True
+        entry = cached["explain"]
+        if entry.get("managed") and (entry.get("step") != "complete" or self.transition_due(entry)):
+            return True
+        if zlib.crc32(uuid.encode()) % self.refresh_days == self.refresh_slot:
+            return True
+        self.reused[idx["index"]] = entry
+        return False
+
+    # Function to add the cached entries of the skipped rows to the explain results
+    def merge(self, explain):
+        explained = len(explain)
+        for index_name, entry in self.reused.items():
+            explain.setdefault(index_name, entry)
+        log.info(f"Incremental ILM explain: explained {explained} indices, reused {len(self.reused)} cached entries")
+
+# Function to build the state to save after a run from its cluster dict
+def next_state(cluster, now_millis=None):
+    state = empty_state()
+    state["saved_at"] = now_millis if now_millis is not None else int(time.time() * 1000)
+    explain = cluster["explain"]
+    for idx in cluster["indices"]:
+        entry = explain.get(idx["index"])
+        if idx.get("uuid") and entry:
+            state["indices"][idx["uuid"]] = {"index": idx["index"], "size": idx.get("pri.store.size"), "explain": entry}
+    state["policies"] = cluster["policies"]
+    return state
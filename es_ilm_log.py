@@ -0,0 +1,93 @@
+import json
+import logging
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+# Shared logging setup for the es-ilm scripts.
+#
+# Console output keeps the "Warning: ..." / "Error: ..." style the scripts have
+# always printed. Warnings logged with extra={"warning_type": ...} are rate
+# limited on the console: after `max_repeats` messages of one type the rest are
+# only counted, and log_warning_summary() reports the counts at the end of the
+# run. The optional JSON-lines log file receives every record.
+
+LOGGER_NAME = "es_ilm"
+DEFAULT_MAX_REPEATS = 5
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# Console formatter matching the scripts' print-based messages
+class ConsoleFormatter(logging.Formatter):
+    prefixes = {logging.WARNING: "Warning: ", logging.ERROR: "Error: ", logging.CRITICAL: "Error: "}
+
+    def format(self, record):
+        return self.prefixes.get(record.levelno, "") + record.getMessage()
+
+# JSON-lines formatter for the optional log file
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        warning_type = getattr(record, "warning_type", None)
+        if warning_type:
+            entry["warning_type"] = warning_type
+        return json.dumps(entry)
+
+# Filter that lets the first `max_repeats` warnings of each warning_type
+# through and counts the rest
+class RepeatedWarningFilter(logging.Filter):
+    def __init__(self, max_repeats=DEFAULT_MAX_REPEATS):
+        super().__init__()
+        self.max_repeats = max_repeats
+        self.counts = Counter()
+
+    def filter(self, record):
+        warning_type = getattr(record, "warning_type", None)
+        if warning_type is None:
+            return True
+        self.counts[warning_type] += 1
+        return self.counts[warning_type] <= self.max_repeats
+
+    def suppressed(self):
+        return {t: n - self.max_repeats for t, n in self.counts.items() if n > self.max_repeats}
+
+# Function to (re)configure the shared logger: console output at `level`,
+# plus every record as JSON lines in `log_file` when given
+def setup_logging(level="INFO", log_file=None, max_repeats=DEFAULT_MAX_REPEATS):
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(logging.DEBUG if log_file else level)
+    logger.propagate = False
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(level)
+    console.setFormatter(ConsoleFormatter())
+    console.addFilter(RepeatedWarningFilter(max_repeats))
+    logger.addHandler(console)
+
+    if log_file:
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(JsonLinesFormatter())
+        logger.addHandler(file_handler)
+    return logger
+
+# Function to get the shared logger, with the default console setup if the
+# calling script did not configure it
+def get_logger():
+    if not logger.handlers:
+        setup_logging()
+    return logger
+
+# Function to report how many repeated warnings were kept off the console
+def log_warning_summary():
+    for handler in logger.handlers:
+        for f in handler.filters:
+            if isinstance(f, RepeatedWarningFilter):
+                for warning_type, count in sorted(f.suppressed().items()):
+                    logger.info(f"Suppressed {count} more '{warning_type}' warnings (see --log-file for all of them)")
@@ -0,0 +1,185 @@
+from elasticsearch import NotFoundError, helpers
+from es_ilm_log import get_logger
+
+# Bulk ingestion of the collector's per-index records into an Elasticsearch
+# metrics index, which feeds the Kibana dashboard
+# (kibana_index_ilm_dashboard.txt).
+#
+# Each run adds one document per ILM-managed index, all stamped with the
+# collection time, so the index holds one point per index per run. The
+# documents go out as a single streaming_bulk request stream. Chunks are
+# capped by document count and by request size, so a run over 100k indices
+# makes about 20 bulk requests. Chunks rejected with 429 are retried with
+# backoff.
+#
+# By default the metrics go to a time series data stream (TSDS): index,
+# policy and phase are dimensions, sizes, document and shard counts are
+# gauge metrics. TSDS sorts and compresses each time series together, and
+# its ILM policy downsamples older data to weekly and then 4-weekly points,
+# which keeps a year of daily runs over 40k indices to a small fraction of
+# the raw document count. A TSDS only accepts documents whose @timestamp is
+# within a couple of hours of now, so ingest snapshots right after they are
+# collected. The metrics can also go to a plain index with the same fields.
+#
+# Downsampling turns size_bytes, docs_count and total_shards into
+# aggregate_metric_double (min/max/sum/value_count per interval), which
+# ES|QL on 8.x cannot read. The dashboard therefore splits its panels:
+# - the latest-record ES|QL panels (size by phase, sizes by creation month,
+#   daily sizes, index details) query FROM .ds-<name>-*, the raw backing
+#   indices, and so cover the weeks before downsampling. Downsampled
+#   backing indices are named downsample-<interval>-.ds-<name>-* and are
+#   left out. With --metrics-mode index, point them at the index instead.
+# - the long-term size trend is a TSVB panel built on avg(size_bytes) x
+#   unique count(index) per 28-day bucket. Both aggregations read long and
+#   aggregate_metric_double fields alike, so the panel spans raw and
+#   downsampled data. Averaging also keeps several runs per interval from
+#   adding up.
+
+log = get_logger()
+
+DEFAULT_METRICS_INDEX = "es-ilm-metrics"
+
+# Bulk chunking: ~200 bytes per document, so 5000 documents is about 1MB per
+# request; the byte cap only matters for unusually long index names
+BULK_CHUNK_SIZE = 5000
+BULK_MAX_CHUNK_BYTES = 5 * 1024 * 1024
+BULK_MAX_RETRIES = 3
+
+METRICS_MODES = ["tsds", "index"]
+METRICS_DIMENSIONS = ["index", "policy", "phase"]
+
+# Mappings of the metrics index
+METRICS_MAPPINGS = {
+    "dynamic": "strict",
+    "properties": {
+        "@timestamp": {"type": "date"},
+        "index": {"type": "keyword"},
+        "policy": {"type": "keyword"},
+        "phase": {"type": "keyword"},
+        "size_bytes": {"type": "long"},
+        "docs_count": {"type": "long"},
+        "total_shards": {"type": "integer"},
+        "creation_date": {"type": "date"},
+    },
+}
+
+# Mappings of the time series data stream: the same fields, with the
+# dimensions and gauge metrics marked
+METRICS_TSDS_MAPPINGS = {
+    "dynamic": "strict",
+    "properties": {
+        **METRICS_MAPPINGS["properties"],
+        **{name: {"type": "keyword", "time_series_dimension": True} for name in METRICS_DIMENSIONS},
+        "size_bytes": {"type": "long", "time_series_metric": "gauge"},
+        "docs_count": {"type": "long", "time_series_metric": "gauge"},
+        "total_shards": {"type": "integer", "time_series_metric": "gauge"},
+    },
+}
+
+# ILM policy of the time series data stream: monthly backing indices,
+# downsampled to one point per 7 days after 30 days and per 28 days after
+# 180 days (each interval a multiple of the previous one, and a divisor of
+# the dashboard's 28-day trend buckets), deleted after two years
+METRICS_ILM_POLICY = {
+    "phases": {
+        "hot": {"actions": {"rollover": {"max_age": "30d", "max_primary_shard_size": "10gb"}}},
+        "warm": {"min_age": "30d", "actions": {"downsample": {"fixed_interval": "7d"}, "forcemerge": {"max_num_segments": 1}}},
+        "cold": {"min_age": "180d", "actions": {"downsample": {"fixed_interval": "28d"}}},
+        "delete": {"min_age": "730d", "actions": {"delete": {}}},
+    },
+}
+
+# Function to build the metrics document of one collector record;
+# `creation_millis` is the index creation time in epoch millis (0 if unknown)
+# and total_shards is left out when None (rows collected without pri/rep)
+def metrics_document(record, creation_millis, total_shards=None):
+    document = {
+        "index": record["index"],
+        "policy": record["policy"],
+        "phase": record["phase"],
+        "size_bytes": record["size_bytes"],
+        "docs_count": record["doc_count"],
+    }
+    if total_shards is not None:
+        document["total_shards"] = total_shards
+    if creation_millis:
+        document["creation_date"] = creation_millis
+    return document
+
+# Function to build the metrics documents of the ILM-managed indices one at a
+# time from the cat.indices rows (bytes=b) and ILM explain entries, so a run
+# streams them to bulk_index_metrics without holding them all in memory
+def metrics_documents(indices, explain):
+    for idx in indices:
+        index_ilm = explain.get(idx["index"], {})
+        if not index_ilm.get("managed", False):
+            continue
+        record = {
+            "index": idx["index"],
+            "policy": index_ilm["policy"],
+            "phase": index_ilm.get("phase", "unknown"),
+            "size_bytes": int(idx.get("pri.store.size") or 0),
+            "doc_count": int(idx.get("docs.count") or 0),
+        }
+        total_shards = int(idx.get("pri") or 0) * (1 + int(idx.get("rep") or 0)) if "pri" in idx else None
+        yield metrics_document(record, int(idx.get("creation.date") or 0), total_shards)
+
+# Function to install (or update) the ILM policy and the index template of
+# the time series data stream `name`. The data stream itself is created by
+# the first bulk request.
+def install_metrics_template(es, name=DEFAULT_METRICS_INDEX):
+    es.ilm.put_lifecycle(name=name, policy=METRICS_ILM_POLICY)
+    es.indices.put_index_template(
+        name=name,
+        index_patterns=[name],
+        data_stream={},
+        priority=500,
+        template={
+            "settings": {
+                "index.mode": "time_series",
+                "index.routing_path": METRICS_DIMENSIONS,
+                "index.lifecycle.name": name,
+                "index.codec": "best_compression",
+            },
+            "mappings": METRICS_TSDS_MAPPINGS,
+        },
+        meta={"description": "ILM metrics collected by es-index_info_collector"},
+    )
+    log.info(f"Installed time series index template and ILM policy {name}")
+
+# Function to prepare the metrics target: install the time series template
+# (mode "tsds"), or create a plain index with its mappings if it does not
+# exist (mode "index")
+def ensure_metrics_index(es, index_name=DEFAULT_METRICS_INDEX, mode="tsds"):
+    if mode == "tsds":
+        install_metrics_template(es, index_name)
+        if es.indices.exists(index=index_name):
+            try:
+                es.indices.get_data_stream(name=index_name)
+            except NotFoundError:
+                log.warning(f"{index_name} already exists as a regular index; delete it to switch to the time series data stream")
+    elif not es.indices.exists(index=index_name):
+        es.indices.create(index=index_name, mappings=METRICS_MAPPINGS)
+        log.info(f"Created metrics index {index_name}")
+
+# Function to bulk-index metrics documents (any iterable, consumed once),
+# stamped with `timestamp` (ISO 8601), in one streaming_bulk request stream.
+# Returns (indexed, failed) counts.
+def bulk_index_metrics(es, documents, timestamp, index_name=DEFAULT_METRICS_INDEX,
+                       chunk_size=BULK_CHUNK_SIZE, max_chunk_bytes=BULK_MAX_CHUNK_BYTES):
+    def actions():
+        for document in documents:
+            yield {"_op_type": "create", "_index": index_name, "@timestamp": timestamp, **document}
+
+    indexed = 0
+    failed = 0
+    for ok, item in helpers.streaming_bulk(es, actions(), chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes,
+                                           raise_on_error=False, max_retries=BULK_MAX_RETRIES):
+        if ok:
+            indexed += 1
+            continue
+        failed += 1
+        error = item.get("create", {}).get("error")
+        log.warning(f"Indexing metrics document into {index_name} failed: {error}",
+                    extra={"warning_type": "bulk_failed"})
+    return indexed, failed
@@ -0,0 +1,271 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib json module
+    orjson = None
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+
+# Report writers for the es-ilm scripts.
+#
+# CSV rows are written to the file as they are produced, under a fixed header,
+# so memory use does not grow with the number of rows. A row only names the
+# columns it sets; every other column is left empty. NDJSON output writes one
+# compact JSON record per line in the same streaming way, optionally gzip or
+# zstd compressed.
+#
+# JSON documents are serialized with orjson when it is installed (several
+# times faster than the json module), indented or compact, and can be
+# compressed on the fly with gzip or zstd (needs zstandard).
+#
+# Parquet output (needs pyarrow) writes typed columnar tables, one file per
+# table, for loading many daily runs back into notebooks. Every table starts
+# with a report_date column so files of different days can be concatenated,
+# and the repetitive policy/phase columns are dictionary-encoded.
+#
+# Human-readable sizes are an output concern: the reports keep byte counts
+# and call format_size() only for the cells they emit, and not at all in
+# bytes-only mode (--bytes-only), which leaves out the readable size columns
+# and keys for machine consumers.
+
+# Columns of the ILM policy analyzer CSV, shared by all of its row kinds
+POLICY_ANALYZER_CSV_COLUMNS = [
+    "Policy", "Num Indices", "Total Shards", "Total Size", "Total Size (Bytes)",
+    "Phase", "Phase Num Indices", "Phase Lifetime", "Phase Rollover",
+    "Month", "Month Num Indices", "Month Size", "Month Size (Bytes)",
+    "Date", "Date Phase", "Date Num Indices", "Date Size", "Date Size (Bytes)", "Date Indices",
+]
+
+# Columns of the index info collector CSV
+COLLECTOR_CSV_COLUMNS = ["Index", "Policy", "Phase", "Size", "Size (Bytes)", "Creation Date", "Document Count"]
+
+# Human-readable size columns of the CSVs, left out in bytes-only mode
+READABLE_SIZE_COLUMNS = {"Size", "Total Size", "Month Size", "Date Size"}
+
+# Function to format bytes to human-readable string. Memoized: the same
+# totals are emitted in the JSON and the CSV, and many indices share a size
+# (empty indices, for one).
+@lru_cache(maxsize=65536)
+def format_size(bytes):
+    for unit, divisor in [('GB', 1024**3), ('MB', 1024**2), ('KB', 1024), ('B', 1)]:
+        if bytes >= divisor:
+            return f"{bytes / divisor:.2f}{unit}"
+    return f"{bytes:.2f}B"
+
+# Function to get the CSV columns to write: all of them, or without the
+# human-readable size columns in bytes-only mode
+def csv_columns(columns, bytes_only=False):
+    return [c for c in columns if c not in READABLE_SIZE_COLUMNS] if bytes_only else columns
+
+class ReportFileWriter:
+    # Opens `path` for writing (or appending), as plain text or as a gzip or
+    # zstd compressed text stream. On an I/O error the writer records it in
+    # `error` and ignores further rows, so the caller can keep going (e.g. to
+    # write its other outputs) and report the failure at the end.
+    def __init__(self, path, buffering=-1, append=False, compression="none"):
+        self.path = path
+        self.rows_written = 0
+        self.error = None
+        self.file = None
+        try:
+            if compression == "none":
+                self.file = open(path, "a" if append else "w", newline="", buffering=buffering)
+            else:
+                self.file = io.TextIOWrapper(open_output(path, compression, append), encoding="utf-8", newline="")
+        except OSError as e:
+            self.fail(e)
+
+    # Function to record a write error and stop writing
+    def fail(self, error):
+        if self.error is None:
+            self.error = str(error)
+        self.close()
+
+    # Function to flush and close the file
+    def close(self):
+        file, self.file = self.file, None
+        if file is not None:
+            try:
+                file.close()
+            except OSError as e:
+                if self.error is None:
+                    self.error = str(e)
+
+class CsvRowWriter(ReportFileWriter):
+    # Writes the fixed header when the file is opened, unless appending to
+    # a file that already has rows
+    def __init__(self, path, columns, append=False):
+        super().__init__(path, append=append)
+        self.columns = columns
+        self.positions = {column: i for i, column in enumerate(columns)}
+        self.writer = None
+        if self.file is not None:
+            self.writer = csv.writer(self.file, lineterminator="\n")
+            try:
+                if self.file.tell() == 0:
+                    self.writer.writerow(columns)
+            except (OSError, csv.Error) as e:
+                self.fail(e)
+
+    # Function to write one row from a {column: value} mapping of the columns it sets
+    def write(self, fields):
+        if self.file is None:
+            return
+        row = [""] * len(self.columns)
+        for column, value in fields.items():
+            row[self.positions[column]] = value
+        try:
+            self.writer.writerow(row)
+            self.rows_written += 1
+        except (OSError, csv.Error) as e:
+            self.fail(e)
+
+class NdjsonWriter(ReportFileWriter):
+    # Line buffered, so every record written so far is on disk even if the
+    # run dies part-way. Compressed with gzip or zstd, records go through
+    # the compressor's buffers instead and the stream is complete on close.
+    def __init__(self, path, append=False, compression="none"):
+        super().__init__(path, buffering=1, append=append, compression=compression)
+
+    # Function to write one record as a compact JSON line
+    def write(self, record):
+        if self.file is None:
+            return
+        try:
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.rows_written += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.fail(e)
+
+JSON_BACKENDS = ["auto", "orjson", "json"]
+JSON_COMPRESSIONS = ["none", "gzip", "zstd"]
+JSON_COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Function to tell whether an output compression is available
+def compression_available(compression):
+    return compression != "zstd" or zstandard is not None
+
+# Function to serialize a JSON document to bytes: indented like
+# json.dump(indent=2), or compact without any whitespace
+def dumps_json(data, compact=False, backend="auto"):
+    if backend == "orjson" or (backend == "auto" and orjson is not None):
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if compact:
+        return json.dumps(data, separators=(",", ":")).encode()
+    return json.dumps(data, indent=2).encode()
+
+# Function to open a binary output stream, compressed with gzip or zstd.
+# Appending adds a new gzip member or zstd frame, which readers concatenate.
+def open_output(path, compression="none", append=False):
+    mode = "ab" if append else "wb"
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, mode), closefd=True)
+    return open(path, mode)
+
+# Function to write a JSON document to `path`
+def write_json(path, data, compact=False, compression="none", backend="auto"):
+    payload = dumps_json(data, compact, backend)
+    with open_output(path, compression) as f:
+        f.write(payload)
+
+PARQUET_COMPRESSIONS = ["zstd", "snappy"]
+
+# Column types of the Parquet tables; "category" columns are dictionary-encoded
+INDEX_PARQUET_COLUMNS = {
+    "index": "string", "policy": "category", "phase": "category", "size_bytes": "int64",
+    "total_shards": "int64", "creation_date": "category",
+}
+COLLECTOR_PARQUET_COLUMNS = {
+    "index": "string", "policy": "category", "phase": "category", "size_bytes": "int64",
+    "creation_date": "category", "doc_count": "int64",
+}
+ROLLUP_PARQUET_COLUMNS = {
+    "policies": {"policy": "category", "num_indices": "int64", "total_shards": "int64", "size_bytes": "int64"},
+    "phases": {"policy": "category", "phase": "category", "num_indices": "int64", "total_shards": "int64",
+               "size_bytes": "int64"},
+    "months": {"policy": "category", "month": "category", "num_indices": "int64", "size_bytes": "int64"},
+    "days": {"policy": "category", "date": "category", "phase": "category", "num_indices": "int64",
+             "size_bytes": "int64"},
+}
+
+# Function to tell whether Parquet output is available
+def parquet_available():
+    return pa is not None
+
+# Function to write a {column: list of values} table as a Parquet file, typed
+# by `column_types`, with a leading report_date column (default: today)
+def write_parquet(path, table, column_types, compression="zstd", report_date=None):
+    num_rows = len(next(iter(table.values()))) if table else 0
+    arrays = [pa.repeat(pa.scalar(report_date or date.today(), pa.date32()), num_rows)]
+    names = ["report_date"]
+    for name, column_type in column_types.items():
+        if column_type == "category":
+            array = pa.array(table[name], pa.string()).dictionary_encode()
+        else:
+            array = pa.array(table[name], getattr(pa, column_type)())
+        arrays.append(array)
+        names.append(name)
+    pq.write_table(pa.Table.from_arrays(arrays, names=names), path, compression=compression)
+
+# Function to flatten the analyzer's policy rollups (as built by
+# es_ilm_rollup.RollupAggregator or es_ilm_table.rollup_from_table) into
+# the per-index table and the policy, phase, month and day tables
+def rollup_parquet_tables(policy_rollups):
+    indices = {name: [] for name in INDEX_PARQUET_COLUMNS}
+    tables = {table: {name: [] for name in columns} for table, columns in ROLLUP_PARQUET_COLUMNS.items()}
+    policies, phases, months, days = (tables[t] for t in ("policies", "phases", "months", "days"))
+    for policy, rollup in policy_rollups.items():
+        policies["policy"].append(policy)
+        policies["num_indices"].append(rollup["num_indices"])
+        policies["total_shards"].append(rollup["total_shards"])
+        policies["size_bytes"].append(rollup["size_bytes"])
+        for phase, p in rollup["phases"].items():
+            phases["policy"].append(policy)
+            phases["phase"].append(phase)
+            phases["num_indices"].append(p["num_indices"])
+            phases["total_shards"].append(p["total_shards"])
+            phases["size_bytes"].append(p["size_bytes"])
+            for record in p["indices"]:
+                if not isinstance(record, dict):
+                    record = {"index": record.index, "size_bytes": record.size_bytes,
+                              "total_shards": record.total_shards, "creation_date": record.creation_date}
+                indices["index"].append(record["index"])
+                indices["policy"].append(policy)
+                indices["phase"].append(phase)
+                indices["size_bytes"].append(record["size_bytes"])
+                indices["total_shards"].append(record["total_shards"])
+                indices["creation_date"].append(record["creation_date"])
+        for month, m in rollup["months"].items():
+            months["policy"].append(policy)
+            months["month"].append(month)
+            months["num_indices"].append(m["num_indices"])
+            months["size_bytes"].append(m["size_bytes"])
+        for day, phase_dict in rollup["days"].items():
+            for phase, d in phase_dict.items():
+                days["policy"].append(policy)
+                days["date"].append(day)
+                days["phase"].append(phase)
+                days["num_indices"].append(d["num_indices"])
+                days["size_bytes"].append(d["size_bytes"])
+    tables["indices"] = indices
+    return tables
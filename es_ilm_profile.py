@@ -0,0 +1,73 @@
+import atexit
+import cProfile
+import linecache
+import tracemalloc
+
+# Opt-in profiling of a whole script run (--profile cpu|memory).
+#
+# start_profiling() is called once the output names are known and registers an
+# exit handler, so the profile covers the rest of the run however it ends:
+#   cpu     cProfile; the stats are dumped to <prefix>.pstats, to be read
+#           with `python -m pstats` or snakeviz
+#   memory  tracemalloc; the top allocation sites by size still allocated at
+#           the end of the run, and the peak traced memory, are written to
+#           <prefix>.memory.txt
+# Profiling slows the run down, tracemalloc more than cProfile, so the
+# timings of a profiled run are not comparable with normal runs.
+
+PROFILE_MODES = ["cpu", "memory"]
+DEFAULT_PROFILE_TOP = 25
+
+# Function to start profiling in `mode`; the results are written next to the
+# other outputs as <prefix>.pstats or <prefix>.memory.txt when the run exits.
+# `report` is called with a message naming the file (print or log.info).
+def start_profiling(mode, prefix, top=DEFAULT_PROFILE_TOP, report=print):
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        atexit.register(dump_cpu_profile, profiler, f"{prefix}.pstats", report)
+    elif mode == "memory":
+        tracemalloc.start()
+        atexit.register(dump_memory_profile, f"{prefix}.memory.txt", top, report)
+    else:
+        raise ValueError(f"unknown profile mode '{mode}'")
+
+# Function to stop the CPU profiler and write its stats
+def dump_cpu_profile(profiler, path, report=print):
+    profiler.disable()
+    try:
+        profiler.dump_stats(path)
+        report(f"CPU profile written to {path}")
+    except OSError as e:
+        report(f"Error writing CPU profile '{path}': {str(e)}")
+
+# Function to stop tracemalloc and write the top-N allocation sites
+def dump_memory_profile(path, top=DEFAULT_PROFILE_TOP, report=print):
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ])
+    stats = snapshot.statistics("lineno")
+    lines = [
+        f"Traced memory: {current / 1024**2:.1f} MiB at exit, {peak / 1024**2:.1f} MiB peak",
+        f"Top {min(top, len(stats))} allocation sites still allocated at exit:",
+    ]
+    for rank, stat in enumerate(stats[:top], start=1):
+        frame = stat.traceback[0]
+        lines.append(f"#{rank}: {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        source = linecache.getline(frame.filename, frame.lineno).strip()
+        if source:
+            lines.append(f"    {source}")
+    other = stats[top:]
+    if other:
+        lines.append(f"{len(other)} other sites: {sum(stat.size for stat in other) / 1024:.1f} KiB")
+    try:
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        report(f"Memory profile written to {path}")
+    except OSError as e:
+        report(f"Error writing memory profile '{path}': {str(e)}")
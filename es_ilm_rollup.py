@@ -0,0 +1,129 @@
+# Single-pass rollup aggregation for the ILM policy analyzer.
+#
+# Each index record is consumed once, and all rollup levels are updated
+# incrementally: policy totals, policy -> phase, policy -> month and
+# policy -> day -> phase. Aggregation cost is O(indices) instead of
+# re-walking every policy's index list once per level. Records are kept by
+# reference in the phase and day buckets (not copied) for the per-index
+# listings in the JSON output.
+#
+# A record is an IndexRecord, or (for older analyzer versions) a dict with at
+# least: phase, size_bytes, total_shards, creation_month and creation_date
+# ("unknown" when the creation date is not known; such indices are left out
+# of the month and day rollups).
+
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # creation_date_strings falls back to the cached formatter
+    np = None
+
+# Function to format an epoch day as YYYY-MM-DD; a few hundred distinct days
+# cover all indices, so the strings are cached and shared
+@lru_cache(maxsize=None)
+def epoch_day_string(day):
+    return datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+
+# Function to get the creation date (YYYY-MM-DD) of epoch millis, or
+# "unknown" for a missing (0) creation date
+def creation_date_string(creation_millis):
+    return epoch_day_string(creation_millis // 86400000) if creation_millis > 0 else "unknown"
+
+# Function to get the creation dates of a whole column of epoch millis at
+# once, with "unknown" for missing (0) dates. With NumPy the epoch days are
+# computed by integer division and only the distinct days are converted, by
+# one datetime64 cast; no datetime object is built per index.
+def creation_date_strings(creation_millis):
+    if np is None or not len(creation_millis):
+        return [creation_date_string(millis) for millis in creation_millis]
+    millis = np.asarray(creation_millis, dtype=np.int64)
+    unique_days, day_codes = np.unique(millis // 86400000, return_inverse=True)
+    dates = unique_days.astype("datetime64[D]").astype(str).astype(object)[day_codes]
+    dates[millis <= 0] = "unknown"
+    return dates.tolist()
+
+class IndexRecord(namedtuple("IndexRecord", "index size_bytes total_shards phase creation_millis")):
+    # One ILM-managed index in the rollups: an immutable tuple of the index
+    # name, integer size and shard count, phase and creation time in epoch
+    # millis (0 if unknown). Replaces a dict of eight keys with preformatted
+    # size and date strings; the strings are derived when the output is
+    # written, which halves the memory of the rollups (about 350 bytes less
+    # per index, see es-index_record_benchmark).
+    __slots__ = ()
+
+    @property
+    def creation_date(self):
+        return creation_date_string(self.creation_millis)
+
+    @property
+    def creation_month(self):
+        date = creation_date_string(self.creation_millis)
+        return date[:7] if date != "unknown" else date
+
+# Function to create an empty policy-level rollup
+def new_policy_rollup():
+    return {
+        "num_indices": 0,
+        "total_shards": 0,
+        "size_bytes": 0,
+        "phases": {},
+        "months": {},
+        "days": {},
+    }
+
+class RollupAggregator:
+    def __init__(self):
+        # policy -> policy rollup, in order of first appearance
+        self.policies = {}
+
+    # Function to add one index record (IndexRecord or dict) to every rollup
+    # level of its policy
+    def add(self, policy, record):
+        if isinstance(record, IndexRecord):
+            size_bytes = record.size_bytes
+            total_shards = record.total_shards
+            phase = record.phase
+            date = record.creation_date
+            month = date[:7] if date != "unknown" else date
+        else:
+            size_bytes = record["size_bytes"]
+            total_shards = record["total_shards"]
+            phase = record["phase"]
+            month = record["creation_month"]
+            date = record["creation_date"]
+
+        rollup = self.policies.get(policy)
+        if rollup is None:
+            rollup = self.policies[policy] = new_policy_rollup()
+        rollup["num_indices"] += 1
+        rollup["total_shards"] += total_shards
+        rollup["size_bytes"] += size_bytes
+
+        phase_rollup = rollup["phases"].get(phase)
+        if phase_rollup is None:
+            phase_rollup = rollup["phases"][phase] = {"num_indices": 0, "total_shards": 0, "size_bytes": 0, "indices": []}
+        phase_rollup["num_indices"] += 1
+        phase_rollup["total_shards"] += total_shards
+        phase_rollup["size_bytes"] += size_bytes
+        phase_rollup["indices"].append(record)
+
+        if month != "unknown":
+            month_rollup = rollup["months"].get(month)
+            if month_rollup is None:
+                month_rollup = rollup["months"][month] = {"num_indices": 0, "size_bytes": 0}
+            month_rollup["num_indices"] += 1
+            month_rollup["size_bytes"] += size_bytes
+
+        if date != "unknown":
+            day_phases = rollup["days"].get(date)
+            if day_phases is None:
+                day_phases = rollup["days"][date] = {}
+            day_rollup = day_phases.get(phase)
+            if day_rollup is None:
+                day_rollup = day_phases[phase] = {"num_indices": 0, "size_bytes": 0, "indices": []}
+            day_rollup["num_indices"] += 1
+            day_rollup["size_bytes"] += size_bytes
+            day_rollup["indices"].append(record)
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+from es_ilm_rollup import IndexRecord
+
+# Columnar index table for the ILM policy analyzer.
+#
+# The cat.indices rows go straight into a DataFrame and are joined with the
+# ILM explain entries by index name. The policy, phase, month and day
+# rollups are computed with vectorized groupby instead of per-row Python
+# dict updates. rollup_from_table() returns the same structure as
+# es_ilm_rollup.RollupAggregator.policies, so the analyzer's output stage
+# works with either engine.
+
+# Function to build the per-index table of ILM-managed indices from cat rows
+# (requested with bytes=b) and explain entries. Columns: index, policy,
+# phase, size_bytes, total_shards, creation_millis, creation_month,
+# creation_date, plus docs_count when the cat rows have docs.count.
+def build_index_table(indices, explain):
+    cat = pd.DataFrame(indices)
+    if cat.empty or not explain:
+        return empty_index_table()
+
+    ilm = pd.DataFrame.from_dict(explain, orient="index")
+    if "managed" not in ilm.columns or "policy" not in ilm.columns:
+        return empty_index_table()
+    ilm = ilm[ilm["managed"].eq(True)].copy()
+    if "phase" not in ilm.columns:
+        ilm["phase"] = None
+    ilm = ilm[["policy", "phase"]]
+    ilm["phase"] = ilm["phase"].fillna("unknown")
+
+    table = cat.join(ilm, on="index", how="inner").reset_index(drop=True)
+
+    def int_column(name):
+        if name not in table.columns:
+            return pd.Series(0, index=table.index, dtype="int64")
+        return pd.to_numeric(table[name], errors="coerce").fillna(0).astype("int64")
+
+    out = pd.DataFrame({
+        "index": table["index"],
+        "policy": table["policy"],
+        "phase": table["phase"],
+        "size_bytes": int_column("pri.store.size"),
+        "total_shards": int_column("pri") * (1 + int_column("rep")),
+        "creation_millis": int_column("creation.date"),
+    })
+    if "docs.count" in table.columns:
+        out["docs_count"] = int_column("docs.count")
+
+    # Creation month and day for the whole table: epoch days by integer
+    # division, then only the distinct days are formatted as strings
+    days = out["creation_millis"].to_numpy() // 86400000
+    unique_days, day_codes = np.unique(days, return_inverse=True)
+    unique_dates = pd.to_datetime(unique_days, unit="D")
+    day_strings = np.array(unique_dates.strftime("%Y-%m-%d"), dtype=object)
+    month_strings = np.array(unique_dates.strftime("%Y-%m"), dtype=object)
+    day_strings[unique_days <= 0] = "unknown"
+    month_strings[unique_days <= 0] = "unknown"
+    unknown = out["creation_millis"].to_numpy() <= 0
+    out["creation_month"] = np.where(unknown, "unknown", month_strings[day_codes])
+    out["creation_date"] = np.where(unknown, "unknown", day_strings[day_codes])
+    return out
+
+# Function to create an empty index table with the expected columns
+def empty_index_table():
+    return pd.DataFrame({
+        "index": pd.Series(dtype="object"),
+        "policy": pd.Series(dtype="object"),
+        "phase": pd.Series(dtype="object"),
+        "size_bytes": pd.Series(dtype="int64"),
+        "total_shards": pd.Series(dtype="int64"),
+        "creation_millis": pd.Series(dtype="int64"),
+        "creation_month": pd.Series(dtype="object"),
+        "creation_date": pd.Series(dtype="object"),
+    })
+
+# Function to iterate over a grouped aggregate as (group key, *column values)
+# with plain Python ints, which json.dump can serialize
+def group_rows(frame, columns):
+    return zip(frame.index, *(frame[c].astype("int64").tolist() for c in columns))
+
+# Function to get the row labels of every group of a sort=False groupby, in
+# group order, from one stable argsort of the group numbers
+def group_members(grouped):
+    group_numbers = grouped.ngroup()
+    codes = group_numbers.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    labels = group_numbers.index.to_numpy()[order].tolist()
+    boundaries = [0] + (np.flatnonzero(np.diff(codes[order])) + 1).tolist() + [len(labels)]
+    return [labels[start:end] for start, end in zip(boundaries, boundaries[1:])]
+
+# Function to compute the policy, phase, month and day rollups of an index
+# table with groupby. The per-index listings hold IndexRecords; older
+# analyzer versions pass `format_size` to get dict records with a
+# precomputed size_readable string instead.
+def rollup_from_table(table, format_size=None):
+    policies = {}
+    if table.empty:
+        return policies
+
+    # One record per index for the per-index listings, shared by reference
+    if format_size is None:
+        records = list(map(IndexRecord._make, zip(*(table[c].tolist() for c in IndexRecord._fields))))
+    else:
+        columns = ["index", "size_bytes", "total_shards", "phase", "creation_month", "creation_date"]
+        values = [table[c].tolist() for c in columns]
+        values.insert(2, [format_size(b) for b in values[1]])
+        columns.insert(2, "size_readable")
+        records = [dict(zip(columns, row)) for row in zip(*values)]
+
+    totals = table.groupby("policy", sort=False).agg(
+        num_indices=("index", "size"), total_shards=("total_shards", "sum"), size_bytes=("size_bytes", "sum"))
+    for policy, num_indices, total_shards, size_bytes in group_rows(totals, ["num_indices", "total_shards", "size_bytes"]):
+        policies[policy] = {
+            "num_indices": num_indices,
+            "total_shards": total_shards,
+            "size_bytes": size_bytes,
+            "phases": {},
+            "months": {},
+            "days": {},
+        }
+
+    by_phase = table.groupby(["policy", "phase"], sort=False)
+    phase_totals = by_phase.agg(
+        num_indices=("index", "size"), total_shards=("total_shards", "sum"), size_bytes=("size_bytes", "sum"))
+    phase_rows = group_rows(phase_totals, ["num_indices", "total_shards", "size_bytes"])
+    for ((policy, phase), num_indices, total_shards, size_bytes), members in zip(phase_rows, group_members(by_phase)):
+        policies[policy]["phases"][phase] = {
+            "num_indices": num_indices,
+            "total_shards": total_shards,
+            "size_bytes": size_bytes,
+            "indices": [records[i] for i in members],
+        }
+
+    dated = table[table["creation_date"] != "unknown"]
+    month_totals = dated.groupby(["policy", "creation_month"], sort=False).agg(
+        num_indices=("index", "size"), size_bytes=("size_bytes", "sum"))
+    for (policy, month), num_indices, size_bytes in group_rows(month_totals, ["num_indices", "size_bytes"]):
+        policies[policy]["months"][month] = {"num_indices": num_indices, "size_bytes": size_bytes}
+
+    by_day = dated.groupby(["policy", "creation_date", "phase"], sort=False)
+    day_totals = by_day.agg(num_indices=("index", "size"), size_bytes=("size_bytes", "sum"))
+    day_rows = group_rows(day_totals, ["num_indices", "size_bytes"])
+    for ((policy, date, phase), num_indices, size_bytes), members in zip(day_rows, group_members(by_day)):
+        policies[policy]["days"].setdefault(date, {})[phase] = {
+            "num_indices": num_indices,
+            "size_bytes": size_bytes,
+            "indices": [records[i] for i in members],
+        }
+    return policies
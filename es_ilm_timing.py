@@ -0,0 +1,209 @@
+import threading
+import time
+from contextlib import nullcontext
+
+from elastic_transport import AsyncTransport, Transport, Urllib3HttpNode
+
+# AiohttpHttpNode imports fine without aiohttp and only fails when a node is
+# built, so check for aiohttp itself (as es_ilm_collect does)
+try:
+    import aiohttp  # noqa: F401
+    from elastic_transport import AiohttpHttpNode
+except ImportError:
+    AiohttpHttpNode = None
+
+# Per-stage timing and HTTP request statistics for the reports.
+#
+# RunTimings keeps the wall time of each stage of a run (connect,
+# cat_indices, explain, policies, aggregation, json_write, csv_write, ...).
+# Stages may nest: time spent in an inner stage (e.g. csv_write while the
+# aggregation loop streams CSV rows) counts for the inner stage only.
+# Requests that run concurrently (the async engine fetches policies while
+# cat.indices and explain are running) are timed as spans instead, which
+# do not nest and may overlap.
+# RequestStats counts what the Elasticsearch client sent: logical requests,
+# HTTP attempts (so retries), bytes received and the latency of every
+# attempt. Pass it to es_ilm_collect.connect / collect_cluster_async, which
+# build the client with the instrumented node and transport classes below.
+
+class RequestStats:
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.bytes_received = 0
+        self.latencies = []
+        self.lock = threading.Lock()
+
+    # Function to record one HTTP attempt
+    def record_attempt(self, seconds, num_bytes):
+        with self.lock:
+            self.attempts += 1
+            self.bytes_received += num_bytes
+            self.latencies.append(seconds)
+
+    # Function to record one logical request (one or more attempts)
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    # Function to get a latency percentile in milliseconds (nearest rank)
+    def latency_percentile(self, percent):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        rank = max(1, -(-len(latencies) * percent // 100))
+        return round(latencies[rank - 1] * 1000, 2)
+
+    # Function to summarize the statistics as a JSON-ready dict
+    def as_dict(self):
+        return {
+            "count": self.requests,
+            "retries": max(0, self.attempts - self.requests),
+            "bytes_received": self.bytes_received,
+            "latency_ms": {f"p{percent}": self.latency_percentile(percent) for percent in (50, 95, 99)},
+        }
+
+    # Function to build the node and transport classes recording into these
+    # statistics, as client keyword arguments (node_class, transport_class)
+    def client_classes(self, use_async=False):
+        stats = self
+        if use_async:
+            if AiohttpHttpNode is None:
+                raise RuntimeError("instrumenting the async client requires aiohttp (pip install 'elasticsearch[async]')")
+            class InstrumentedAiohttpNode(AiohttpHttpNode):
+                async def perform_request(self, *args, **kwargs):
+                    start = time.perf_counter()
+                    num_bytes = 0
+                    try:
+                        response = await super().perform_request(*args, **kwargs)
+                        num_bytes = len(response.body or b"")
+                        return response
+                    finally:
+                        stats.record_attempt(time.perf_counter() - start, num_bytes)
+
+            class InstrumentedAsyncTransport(AsyncTransport):
+                async def perform_request(self, *args, **kwargs):
+                    stats.record_request()
+                    return await super().perform_request(*args, **kwargs)
+
+            return {"node_class": InstrumentedAiohttpNode, "transport_class": InstrumentedAsyncTransport}
+
+        class InstrumentedUrllib3Node(Urllib3HttpNode):
+            def perform_request(self, *args, **kwargs):
+                start = time.perf_counter()
+                num_bytes = 0
+                try:
+                    response = super().perform_request(*args, **kwargs)
+                    num_bytes = len(response.body or b"")
+                    return response
+                finally:
+                    stats.record_attempt(time.perf_counter() - start, num_bytes)
+
+        class InstrumentedTransport(Transport):
+            def perform_request(self, *args, **kwargs):
+                stats.record_request()
+                return super().perform_request(*args, **kwargs)
+
+        return {"node_class": InstrumentedUrllib3Node, "transport_class": InstrumentedTransport}
+
+class StageTimer:
+    # Context manager for one stage of a RunTimings; created by RunTimings.stage
+    __slots__ = ("timings", "name")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.timings.start(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.stop()
+        return False
+
+class SpanTimer:
+    # Context manager adding its wall time to a stage without nesting;
+    # created by RunTimings.span
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class RunTimings:
+    def __init__(self, request_stats=None):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.active = []
+        self.resumed = self.started
+        self.request_stats = request_stats or RequestStats()
+
+    # Function to add seconds to a stage
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    # Function to start stage `name`, pausing the current stage if any
+    def start(self, name):
+        now = time.perf_counter()
+        if self.active:
+            self.add(self.active[-1], now - self.resumed)
+        self.active.append(name)
+        self.resumed = now
+
+    # Function to stop the current stage, resuming the one it interrupted
+    def stop(self):
+        now = time.perf_counter()
+        self.add(self.active.pop(), now - self.resumed)
+        self.resumed = now
+
+    # Function to time a block as stage `name` (with timings.stage("explain"): ...)
+    def stage(self, name):
+        return StageTimer(self, name)
+
+    # Function to wrap `function` so every call is timed as stage `name`
+    def timed(self, name, function):
+        def wrapper(*args, **kwargs):
+            self.start(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stop()
+        return wrapper
+
+    # Function to time a block as stage `name`, safe in concurrent tasks
+    def span(self, name):
+        return SpanTimer(self, name)
+
+    # Function to summarize the run so far as the `_meta.timings` dict
+    def as_dict(self):
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 3),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "requests": self.request_stats.as_dict(),
+        }
+
+    # Function to format the one-line summary of the run
+    def summary_line(self):
+        timings = self.as_dict()
+        requests = timings["requests"]
+        latency = requests["latency_ms"]
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings["stages"].items())
+        line = (f"Timings: total {timings['total_seconds']:.2f}s ({stages}); {requests['count']} requests, "
+                f"{requests['bytes_received']} bytes received, {requests['retries']} retries")
+        if latency["p50"] is not None:
+            line += f", latency p50 {latency['p50']}ms p95 {latency['p95']}ms p99 {latency['p99']}ms"
+        return line
+
+# Function to time a block as a span of stage `name` of `timings`, or not at
+# all when timings is None (so shared helpers can take an optional RunTimings)
+def span(timings, name):
+    return timings.span(name) if timings is not None else nullcontext()